@@ -0,0 +1,223 @@
+# 从文献摘要中批量提取纳米制剂数值参数(粒径/PDI/Zeta电位/FPF/MMAD)及载体类型, 生成 nanocarriers.csv 格式的候选数据
+# 输入为 search_test.py 检索得到的文献CSV(如 combined_query_literature.csv), 输出可直接用于 validate_weights.py
+# 用法: python abstract_extraction.py -i combined_query_literature.csv -o extracted_nanocarriers.csv [-w 4]
+import argparse
+import csv
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from formulation import NANOCARRIER_COLUMNS
+
+# 低于该行数时不启动进程池, 避免进程启动开销大于提取本身
+MIN_PARALLEL_ROWS = 2000
+
+_NUM = r'\d+(?:\.\d+)?'
+_SIGNED = r'[-−–+]?\s?\(?\s?\d+(?:\.\d+)?'
+_PM = r'(?:±|\+/-|\+-|&#177;)'
+_SD = rf'(?:\s*{_PM}\s*(?P<sd>{_NUM}))?'
+_RANGE = rf'(?P<low>{_NUM})\s*(?:-|–|~|to)\s*(?P<high>{_NUM})'
+_MICRON = r'(?:μm|µm|um|microns?)'
+
+# 数值参数 -> (预编译正则, 数值列, 标准差列, 触发词)
+# 摘要(小写)中不含任何触发词时跳过该正则
+# 每个正则的 value/sd/low/high/unit 命名组用于解析, 关键词与数值之间不跨越分号且长度受限
+# 粒径不匹配空气动力学粒径(归入MMAD); Zeta电位允许 -(87.7 ± 5.8) mV 的括号写法
+PROPERTY_PATTERNS = {
+    'particle_size': (re.compile(
+        rf'(?:particle size|hydrodynamic diameter|mean diameter|(?<!aerodynamic )diameter|size)[^;\d<>≤≥]{{0,40}}?'
+        rf'(?:{_RANGE}|(?P<value>{_NUM}){_SD})\s*(?P<unit>nm|{_MICRON})',
+        re.IGNORECASE), 'particle_size', 'ps_sd', ('size', 'diameter')),
+    'pdi': (re.compile(
+        rf'(?:\bPDI\b|polydispersity(?: index)?)[^;\d<>≤≥]{{0,30}}?(?P<value>\d*\.\d+|\d+){_SD}',
+        re.IGNORECASE), 'pdi', 'pdi_sd', ('pdi', 'polydispersity')),
+    'zeta': (re.compile(
+        rf'(?:zeta|ζ)[\s-]*potential[^;\d<>≤≥−–+-]{{0,30}}?(?P<value>{_SIGNED}){_SD}\)?\s*mV',
+        re.IGNORECASE), 'zeta', 'zeta_sd', ('zeta', 'ζ')),
+    'fpf': (re.compile(
+        rf'(?:fine particle fraction|\bFPF\b)[^;\d<>≤≥]{{0,30}}?(?P<value>{_NUM}){_SD}\s*%',
+        re.IGNORECASE), 'FPF', 'fpf_sd', ('fpf', 'fine particle')),
+    'mmad': (re.compile(
+        rf'(?:mass median aerodynamic diameter|\bMMAD\b)[^;\d<>≤≥]{{0,30}}?(?P<value>{_NUM}){_SD}\s*{_MICRON}',
+        re.IGNORECASE), 'mmad', 'mmad_sd', ('mmad', 'aerodynamic')),
+}
+
+# 载体类型关键词(正则, 标签, 触发词), 按优先级排列; 取值与 nanocarriers.csv 一致(validate_weights.normalize_carrier_types 统一大小写)
+CARRIER_PATTERNS = [
+    (re.compile(r'nanostructured lipid carriers?|\bNLCs?\b', re.IGNORECASE), 'NLC', ('nlc', 'nanostructured')),
+    (re.compile(r'solid lipid nanoparticles?|\bSLNs?\b', re.IGNORECASE), 'SLN', ('sln', 'solid lipid')),
+    (re.compile(r'\bPLGA\b|poly\(lactic-co-glycolic acid\)', re.IGNORECASE), 'PLGA', ('plga', 'glycolic')),
+    (re.compile(r'liposom', re.IGNORECASE), 'liposome', ('liposom',)),
+    (re.compile(r'chitosan nanoparticles?', re.IGNORECASE), 'Chitosan', ('chitosan',)),
+    (re.compile(r'micelle|polymeric nanoparticles?', re.IGNORECASE), 'Polymer', ('micelle', 'polymeric')),
+    (re.compile(r'\bgold\b|silica|iron oxide|inorganic', re.IGNORECASE), 'Inorganic', ('gold', 'silica', 'iron oxide', 'inorganic')),
+]
+
+SURFACE_PATTERNS = [
+    (re.compile(r'\bPEG(?:ylat\w*)?\b|polyethylene glycol', re.IGNORECASE), 'PEG', ('peg', 'polyethylene')),
+    (re.compile(r'chitosan[- ](?:coated|modified|coating)', re.IGNORECASE), 'Chitosan', ('chitosan',)),
+    (re.compile(r'poloxamer 188', re.IGNORECASE), 'Poloxamer 188', ('poloxamer',)),
+    (re.compile(r'antibod(?:y|ies)[- ](?:conjugated|modified|decorated)', re.IGNORECASE), 'Antibody', ('antibod',)),
+]
+
+# 候选行在nanocarriers.csv列之外附加的来源列(JSON: 列名 -> 来源字段/起止位置/原文)
+PROVENANCE_COLUMN = 'provenance'
+
+
+def _to_float(text):
+    return float(text.replace('−', '-').replace('–', '-').replace('(', '').replace(' ', ''))
+
+
+def _span(source, match, group=0):
+    return {'source': source, 'start': match.start(group), 'end': match.end(group), 'text': match.group(group)}
+
+
+def _first_label(patterns, text):
+    """返回第一个命中的(匹配对象, 标签), 均未命中时返回(None, None)"""
+    lowered = text.lower()
+    for pattern, label, triggers in patterns:
+        if not any(trigger in lowered for trigger in triggers):
+            continue
+        match = pattern.search(text)
+        if match:
+            return match, label
+    return None, None
+
+
+def _parse_numeric(match, prop):
+    """解析一次匹配, 返回(数值, 标准差); 数值不合理时返回None"""
+    groups = match.groupdict()
+    if groups.get('low') is not None:
+        value = (float(groups['low']) + float(groups['high'])) / 2
+        sd = None
+    else:
+        value = _to_float(groups['value'])
+        sd = float(groups['sd']) if groups.get('sd') else None
+
+    if prop == 'particle_size':
+        if re.search(r'aerodynamic|\bMMAD\b', match.group(0), re.IGNORECASE):  # 空气动力学粒径归入MMAD
+            return None
+        if groups['unit'].lower() != 'nm':  # μm换算为nm
+            value *= 1000
+            sd = sd * 1000 if sd is not None else None
+        if not 0 < value <= 1000:
+            return None
+    elif prop == 'pdi' and not 0 < value <= 100:  # 大于1时为百分比/十分比, 由评分函数归一化
+        return None
+    elif prop == 'zeta' and not -100 <= value <= 100:
+        return None
+    elif prop == 'fpf' and not 0 < value <= 100:
+        return None
+    return value, sd
+
+
+def extract_properties(row):
+    """
+    从单篇文献中提取候选制剂数据
+
+    每个参数取摘要中第一个合理的匹配; 载体类型与表面修饰依次在标题和摘要中查找。
+
+    Args:
+        row (dict): 文献信息字典(PMID, Title, Abstract, ...)
+
+    Returns:
+        dict: nanocarriers.csv 格式的候选行(附加provenance列); 未提取到任何数值参数时返回None
+    """
+    abstract = row.get('Abstract') or ''
+    title = row.get('Title') or ''
+    candidate = {column: None for column in NANOCARRIER_COLUMNS}
+    provenance = {}
+
+    lowered = abstract.lower()
+    for prop, (pattern, column, sd_column, triggers) in PROPERTY_PATTERNS.items():
+        if not any(trigger in lowered for trigger in triggers):
+            continue
+        for match in pattern.finditer(abstract):
+            parsed = _parse_numeric(match, prop)
+            if parsed is None:
+                continue
+            candidate[column], candidate[sd_column] = parsed
+            provenance[column] = _span('Abstract', match)
+            break
+
+    if all(candidate[column] is None for _, column, _, _ in PROPERTY_PATTERNS.values()):
+        return None
+
+    for column, patterns in (('carrier_type', CARRIER_PATTERNS), ('surface_modify', SURFACE_PATTERNS)):
+        for source, text in (('Title', title), ('Abstract', abstract)):
+            match, label = _first_label(patterns, text)
+            if match:
+                candidate[column] = label
+                provenance[column] = _span(source, match)
+                break
+
+    pmid = str(row.get('PMID', '')).strip()
+    candidate['name'] = f"pmid{pmid}-{(candidate['carrier_type'] or 'np').lower()}"
+    candidate['refer'] = pmid
+    candidate['NOTE'] = 'auto-extracted'
+    candidate[PROVENANCE_COLUMN] = json.dumps(provenance, ensure_ascii=False)
+    return candidate
+
+
+def extract_corpus(rows, workers=None, chunksize=200):
+    """
+    在进程池中对整个语料提取候选制剂数据
+
+    Args:
+        rows (list): 文献信息字典列表
+        workers (int, optional): 进程数, 默认CPU核数; 1表示不使用进程池
+        chunksize (int): 每个任务包含的文献数
+
+    Returns:
+        list: 候选行列表(保持输入顺序, 不含未提取到数值的文献)
+    """
+    rows = list(rows)
+    if workers == 1 or len(rows) < MIN_PARALLEL_ROWS:
+        results = map(extract_properties, rows)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(extract_properties, rows, chunksize=chunksize))
+    return [candidate for candidate in results if candidate is not None]
+
+
+def read_literature(file_path):
+    """读取文献CSV(列名同 combined_query_literature.csv)"""
+    with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def write_candidates(candidates, file_path):
+    """将候选行写为CSV, 缺失值写为NA"""
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=NANOCARRIER_COLUMNS + [PROVENANCE_COLUMN])
+        writer.writeheader()
+        for candidate in candidates:
+            writer.writerow({k: 'NA' if v is None else v for k, v in candidate.items()})
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="从文献摘要中提取纳米制剂参数")
+    parser.add_argument('-i', '--input', required=True, help="文献CSV路径")
+    parser.add_argument('-o', '--output', default='extracted_nanocarriers.csv', help="输出CSV路径")
+    parser.add_argument('-w', '--workers', type=int, help="进程数, 默认CPU核数")
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    if not os.path.exists(args.input):
+        print(f"错误: 找不到数据文件 '{args.input}'")
+        exit(1)
+
+    rows = read_literature(args.input)
+    print(f"读取 {len(rows)} 篇文献: {args.input}")
+    candidates = extract_corpus(rows, workers=args.workers)
+    write_candidates(candidates, args.output)
+    print(f"提取到 {len(candidates)} 条候选制剂数据, 已保存至 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
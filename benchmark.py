@@ -0,0 +1,499 @@
+# 性能基准测试 使用synthetic_data.py生成的合成数据, 结果写为JSON便于对比不同版本
+# 用法: python benchmark.py -o results.json [--sizes 100,1000] [--compare old.json]
+#       python benchmark.py --check-imports  (只检查 import semi_qua 等入口的导入耗时)
+#       python benchmark.py --check-replay   (用录制响应离线运行 batch_fetch_articles 并检查输出)
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+import synthetic_data
+
+# 默认规模 10^2 - 10^6
+DEFAULT_SIZES = [10 ** k for k in range(2, 7)]
+
+# 逐行Python处理较慢的用例默认只跑到该规模, --full 取消限制
+SLOW_LIMIT = 10 ** 4
+
+# 相对基线变慢超过该比例时标记为回归
+REGRESSION_THRESHOLD = 1.2
+
+# 导入耗时检查: 这些第三方库不应在仅导入评分模块时被加载
+HEAVY_MODULES = ('numpy', 'pandas', 'scipy', 'matplotlib', 'Bio')
+
+# 模块 -> (导入耗时上限(秒), 是否禁止加载HEAVY_MODULES); None表示只记录不检查
+IMPORT_BUDGETS = {
+    'semi_qua': (0.02, True),
+    'validate_weights': None,
+    'search_test': None,
+}
+
+_IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'heavy': sorted(m for m in {heavy!r} if m in sys.modules)}}))\n"
+)
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="评分/验证/文献处理流程的性能基准测试")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="JSON结果输出路径")
+    parser.add_argument('--sizes', help="逗号分隔的数据规模, 默认 100,1000,...,1000000")
+    parser.add_argument('--repeat', type=int, default=3, help="每个用例重复次数(取最短时间)")
+    parser.add_argument('--only', help="逗号分隔的用例名, 只运行这些用例")
+    parser.add_argument('--full', action='store_true', help="慢速用例也运行到最大规模")
+    parser.add_argument('--compare', help="与之前的JSON结果对比并标出回归")
+    parser.add_argument('--check-imports', action='store_true', help="只运行导入耗时检查")
+    parser.add_argument('--check-replay', action='store_true', help="只运行文献获取流程的离线回放检查")
+    return parser.parse_args()
+
+
+def _formulation_columns(size):
+    """合成制剂数据 -> FormulationSet所需的列"""
+    data = synthetic_data.generate_formulations(size)
+    return {
+        'name': data['name'],
+        'particle_size': data['particle_size'],
+        'pdi': data['pdi'],
+        'zeta_potential': data['zeta'],
+        'carrier_type': data['carrier_type'],
+        'surface_modification': data['surface_modify'],
+        'fpf': data['FPF'],
+        'mmad': data['mmad'],
+        'refer': data['refer']
+    }
+
+
+def setup_score_single(size, workdir):
+    from formulation import FormulationSet
+    from semi_qua import score_formulation
+
+    formulations = list(FormulationSet.from_columns(**_formulation_columns(size)))
+    return lambda: [score_formulation(form) for form in formulations]
+
+
+def setup_score_batch(size, workdir):
+    from formulation import FormulationSet
+    from semi_qua import score_formulations
+
+    formulations = FormulationSet.from_columns(**_formulation_columns(size))
+    return lambda: score_formulations(formulations)
+
+
+def setup_load_csv(size, workdir):
+    from validate_weights import load_from_csv
+
+    path = os.path.join(workdir, f'formulations_{size}.csv')
+    synthetic_data.write_formulations_csv(synthetic_data.generate_formulations(size), path)
+    return lambda: load_from_csv(path)
+
+
+def setup_load_markdown(size, workdir):
+    from validate_weights import load_from_markdown
+
+    path = os.path.join(workdir, f'formulations_{size}.md')
+    synthetic_data.write_formulations_markdown(synthetic_data.generate_formulations(size), path)
+    return lambda: load_from_markdown(path)
+
+
+def setup_correlation(size, workdir):
+    from formulation import FormulationSet
+    from semi_qua import score_formulations
+    from validate_weights import metric_correlation
+
+    formulations = FormulationSet.from_columns(**_formulation_columns(size))
+    scores = score_formulations(formulations)
+    return lambda: (metric_correlation(formulations, scores, 'fpf'),
+                    metric_correlation(formulations, scores, 'mmad'))
+
+
+def setup_keyword_corpus(size, workdir):
+    import keyword_analysis
+
+    rows = synthetic_data.generate_literature(size)
+
+    def run():
+        keyword_analysis.reset_counters()
+        keyword_analysis.process_file(None, rows)
+    return run
+
+
+def setup_abstract_extraction(size, workdir):
+    from abstract_extraction import extract_corpus
+
+    rows = synthetic_data.generate_literature(size)
+    return lambda: extract_corpus(rows)
+
+
+def setup_pubmed_parse(size, workdir):
+    from Bio import Entrez
+    from search_test import PubMedSearcher
+
+    xml = synthetic_data.literature_to_pubmed_xml(synthetic_data.generate_literature(size))
+
+    def run():
+        record = Entrez.read(io.BytesIO(xml))
+        return [PubMedSearcher.parse_article(article, str(article['MedlineCitation']['PMID']))
+                for article in record['PubmedArticle']]
+    return run
+
+
+def setup_fetch_replay(size, workdir):
+    from entrez_transport import ReplayTransport, save_response
+    from search_test import PubMedSearcher
+
+    # 按 search_pubmed / fetch_article_details 的请求参数写入录制响应
+    directory = os.path.join(workdir, f'recordings_{size}')
+    term = 'synthetic benchmark query'
+    rows = synthetic_data.generate_literature(size)
+    pmids = [row['PMID'] for row in rows]
+    save_response(directory, 'esearch', {'db': 'pubmed', 'term': term, 'retmax': size, 'sort': 'relevance'},
+                  synthetic_data.pmids_to_esearch_xml(pmids))
+    for row in rows:
+        save_response(directory, 'efetch', {'db': 'pubmed', 'id': row['PMID'], 'retmode': 'xml'},
+                      synthetic_data.literature_to_pubmed_xml([row]))
+
+    searcher = PubMedSearcher(email='benchmark@example.org', transport=ReplayTransport(directory),
+                              request_interval=0, retry_delay=0, output_dir=workdir)
+    return lambda: [searcher.fetch_article_details(pmid) for pmid in searcher.search_pubmed(term, retmax=size)]
+
+
+def setup_model_comparison(size, workdir):
+    from formulation import FormulationSet
+    from model_comparison import compare_models, feature_matrix
+    from semi_qua import score_formulations
+
+    formulations = FormulationSet.from_columns(**_formulation_columns(size))
+    present = formulations.present('fpf')
+    scores = score_formulations(formulations)[present]
+    features = feature_matrix(formulations)[present]
+    return lambda: compare_models(scores, features, formulations['fpf'][present])
+
+
+def setup_isotonic_loo(size, workdir):
+    from formulation import FormulationSet
+    from model_comparison import isotonic_loo
+    from semi_qua import score_formulations
+
+    formulations = FormulationSet.from_columns(**_formulation_columns(size))
+    present = formulations.present('fpf')
+    scores = score_formulations(formulations)[present]
+    return lambda: isotonic_loo(scores, formulations['fpf'][present])
+
+
+def setup_pareto_ranking(size, workdir):
+    from formulation import FormulationSet
+    from pareto_ranking import rank_formulations
+
+    formulations = FormulationSet.from_columns(**_formulation_columns(size))
+    return lambda: rank_formulations(formulations)
+
+
+# 用例名 -> (准备函数, 最大规模; None表示不限制)
+BENCHMARKS = {
+    'calculate_score_single': (setup_score_single, None),
+    'calculate_score_batch': (setup_score_batch, None),
+    'load_from_csv': (setup_load_csv, None),
+    'load_from_markdown': (setup_load_markdown, None),
+    'correlation': (setup_correlation, None),
+    'keyword_corpus': (setup_keyword_corpus, SLOW_LIMIT),
+    'abstract_extraction': (setup_abstract_extraction, 10 ** 5),
+    'pubmed_parse': (setup_pubmed_parse, SLOW_LIMIT),
+    # 每次 Entrez.read 都重新解析PubMed DTD(约20 ms/篇), 逐篇获取只跑到10^3
+    'fetch_replay': (setup_fetch_replay, 10 ** 3),
+    # 距离矩阵/核矩阵为O(n^2)内存, 特征分解为O(n^3)
+    'model_comparison': (setup_model_comparison, 10 ** 3),
+    'isotonic_loo': (setup_isotonic_loo, 10 ** 5),
+    'pareto_ranking': (setup_pareto_ranking, 10 ** 5),
+}
+
+
+def time_call(func, repeat):
+    """先不计时地运行一次(完成惰性导入与缓存加载), 再多次运行并返回每次耗时(秒)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def environment_info():
+    """记录运行环境, 便于解释不同机器/版本之间的差异"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor()
+    }
+
+
+def run_benchmarks(names, sizes, repeat, full=False):
+    """
+    运行基准测试
+
+    Args:
+        names (list): 用例名列表
+        sizes (list): 数据规模列表
+        repeat (int): 重复次数
+        full (bool): 是否忽略慢速用例的规模上限
+
+    Returns:
+        list: 每个(用例, 规模)的结果字典
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            setup, limit = BENCHMARKS[name]
+            for size in sizes:
+                result = {'benchmark': name, 'size': size}
+                if limit is not None and size > limit and not full:
+                    result['skipped'] = f"size above default limit {limit} (use --full)"
+                    results.append(result)
+                    continue
+                try:
+                    func = setup(size, workdir)
+                except ImportError as e:
+                    result['skipped'] = f"missing dependency: {e}"
+                    results.append(result)
+                    print(f"{name:<24} {size:>8}  跳过 ({e})")
+                    continue
+                timings = time_call(func, repeat)
+                best = min(timings)
+                result.update({
+                    'repeat': repeat,
+                    'best_s': best,
+                    'mean_s': sum(timings) / len(timings),
+                    'rows_per_s': size / best if best > 0 else None
+                })
+                results.append(result)
+                print(f"{name:<24} {size:>8}  {best * 1000:10.2f} ms  {result['rows_per_s']:14.0f} rows/s")
+    return results
+
+
+def measure_import(module, repeat):
+    """
+    在新的解释器中导入模块, 返回最短导入耗时与被加载的重量级依赖
+
+    Returns:
+        dict: 结果字典; 导入失败时包含skipped
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    code = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+
+    result = {'module': module}
+    timings = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=root, env=env)
+        if proc.returncode != 0:
+            result['skipped'] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'
+            return result
+        probe = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(probe['seconds'])
+    result.update({'best_s': min(timings), 'heavy_modules': probe['heavy']})
+    return result
+
+
+def check_imports(repeat):
+    """
+    测量各入口模块的导入耗时, 并检查评分模块是否仍保持轻量
+
+    Returns:
+        tuple: (结果列表, 违反预算的说明列表)
+    """
+    results = []
+    violations = []
+    print("导入耗时:")
+    for module, budget in IMPORT_BUDGETS.items():
+        result = measure_import(module, repeat)
+        results.append(result)
+        if 'skipped' in result:
+            print(f"  {module:<22} 跳过 ({result['skipped']})")
+            continue
+        heavy = ', '.join(result['heavy_modules']) or '-'
+        print(f"  {module:<22} {result['best_s'] * 1000:8.2f} ms  重量级依赖: {heavy}")
+        if budget is None:
+            continue
+        limit, forbid_heavy = budget
+        if result['best_s'] > limit:
+            violations.append(f"import {module} took {result['best_s'] * 1000:.1f} ms (budget {limit * 1000:.0f} ms)")
+        if forbid_heavy and result['heavy_modules']:
+            violations.append(f"import {module} loaded {heavy}")
+    for violation in violations:
+        print(f"  <-- 回归: {violation}")
+    return results, violations
+
+
+# 回放检查的主题 -> 合成文献的行号范围(主题间有重叠, 用于检查PMID去重)
+REPLAY_TOPICS = {'topic_a': range(0, 30), 'topic_b': range(20, 50), 'topic_c': list(range(40, 60)) + list(range(0, 5))}
+
+
+def _read_csv(path):
+    import csv
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def _replay_searcher(transport, output_dir):
+    from search_test import PubMedSearcher
+
+    return PubMedSearcher(email='benchmark@example.org', transport=transport,
+                          request_interval=0, retry_delay=0, output_dir=output_dir)
+
+
+def check_replay(workdir):
+    """
+    离线端到端检查文献获取流程:
+    先经 RecordingTransport 录制一遍, 再用 ReplayTransport 回放录制结果运行 batch_fetch_articles,
+    检查合并语料/主题归属/各主题CSV/流程指标; 最后注入网络错误检查重试与指标计数
+
+    Returns:
+        list: 问题说明列表, 为空表示通过
+    """
+    from entrez_transport import RecordingTransport, ReplayTransport, save_response
+
+    rows = synthetic_data.generate_literature(60)
+    terms = {topic: f'synthetic query {topic}' for topic in REPLAY_TOPICS}
+    membership = {topic: [rows[i]['PMID'] for i in indices] for topic, indices in REPLAY_TOPICS.items()}
+    source = os.path.join(workdir, 'source')
+    for topic, term in terms.items():
+        save_response(source, 'esearch', {'db': 'pubmed', 'term': term, 'retmax': 100, 'sort': 'relevance'},
+                      synthetic_data.pmids_to_esearch_xml(membership[topic]))
+    for row in rows:
+        save_response(source, 'efetch', {'db': 'pubmed', 'id': row['PMID'], 'retmode': 'xml'},
+                      synthetic_data.literature_to_pubmed_xml([row]))
+
+    problems = []
+    unique_pmids = list(dict.fromkeys(pmid for pmids in membership.values() for pmid in pmids))
+
+    # 录制, 再从录制目录回放
+    recordings = os.path.join(workdir, 'recordings')
+    with contextlib.redirect_stdout(io.StringIO()):
+        _replay_searcher(RecordingTransport(recordings, ReplayTransport(source)),
+                         os.path.join(workdir, 'recorded')).batch_fetch_articles(terms)
+        replay = ReplayTransport(recordings)
+        output_dir = os.path.join(workdir, 'replayed')
+        summaries = _replay_searcher(replay, output_dir).batch_fetch_articles(terms)
+
+    expected_calls = len(terms) + len(unique_pmids)
+    if replay.calls != expected_calls:
+        problems.append(f"replay made {replay.calls} requests, expected {expected_calls}")
+    merged = _read_csv(os.path.join(output_dir, 'merged_literature.csv'))
+    if [row['PMID'] for row in merged] != unique_pmids:
+        problems.append("merged_literature.csv PMIDs differ from the de-duplicated topic PMIDs")
+    for row in merged:
+        expected_topics = ';'.join(topic for topic, pmids in membership.items() if row['PMID'] in pmids)
+        if row['Topics'] != expected_topics:
+            problems.append(f"PMID {row['PMID']} has Topics {row['Topics']!r}, expected {expected_topics!r}")
+            break
+    with open(os.path.join(output_dir, 'merged_topics.json'), 'r', encoding='utf-8') as f:
+        if json.load(f) != membership:
+            problems.append("merged_topics.json differs from the recorded topic membership")
+    for topic, pmids in membership.items():
+        topic_rows = _read_csv(os.path.join(output_dir, f'{topic}_literature.csv'))
+        if [row['PMID'] for row in topic_rows] != pmids:
+            problems.append(f"{topic}_literature.csv PMIDs differ from its search results")
+    for topic, pmids in membership.items():
+        latency = summaries[topic]['latency']
+        if (summaries[topic]['records'] != len(pmids) or latency['search']['count'] != 1
+                or latency['fetch']['count'] != len(pmids) or latency['write']['count'] != 1):
+            problems.append(f"{topic}_metrics.json does not cover its search, {len(pmids)} fetches and CSV write")
+    if summaries['merged']['records'] != len(unique_pmids) or summaries['merged']['failed_records']:
+        problems.append(f"merged metrics report {summaries['merged']['records']} records, "
+                        f"{summaries['merged']['failed_records']} failed; expected {len(unique_pmids)}, 0")
+
+    # 注入错误: 每篇文献最终成功或计为失败, 重试被计数
+    with contextlib.redirect_stdout(io.StringIO()):
+        searcher = _replay_searcher(ReplayTransport(recordings, error_rate=0.2, seed=0),
+                                    os.path.join(workdir, 'errors'))
+        searcher.fetch_unique_articles(unique_pmids)
+    summary = searcher.metrics.summary()
+    if summary['records'] + summary['failed_records'] != len(unique_pmids):
+        problems.append("with injected errors, records + failed_records != requested PMIDs")
+    elif not summary['retries'].get('fetch:TransportError'):
+        problems.append("with injected errors, no fetch retries were recorded")
+    return problems
+
+
+def compare_results(results, baseline_path):
+    """与基线JSON对比, 返回回归的(用例, 规模, 倍数)列表"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['benchmark'], r['size']): r for r in baseline.get('results', []) if 'best_s' in r}
+
+    regressions = []
+    print(f"\n与基线对比: {baseline_path}")
+    for result in results:
+        old = previous.get((result['benchmark'], result['size']))
+        if 'best_s' not in result or old is None or old['best_s'] <= 0:
+            continue
+        ratio = result['best_s'] / old['best_s']
+        flag = '  <-- 回归' if ratio > REGRESSION_THRESHOLD else ''
+        print(f"{result['benchmark']:<24} {result['size']:>8}  x{ratio:6.2f}{flag}")
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append((result['benchmark'], result['size'], ratio))
+    return regressions
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    sizes = [int(s) for s in args.sizes.split(',')] if args.sizes else DEFAULT_SIZES
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"未知用例: {', '.join(unknown)}; 可选: {', '.join(BENCHMARKS)}")
+        sys.exit(2)
+
+    if args.check_replay:
+        with tempfile.TemporaryDirectory() as workdir:
+            problems = check_replay(workdir)
+        for problem in problems:
+            print(f"回放检查失败: {problem}")
+        if not problems:
+            print("回放检查通过")
+        sys.exit(1 if problems else 0)
+
+    import_results, violations = check_imports(args.repeat)
+    if args.check_imports:
+        sys.exit(1 if violations else 0)
+
+    results = run_benchmarks(names, sizes, args.repeat, args.full)
+    report = {'environment': environment_info(), 'imports': import_results, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n结果已保存至 {args.output}")
+
+    regressions = compare_results(results, args.compare) if args.compare else []
+    if regressions or violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# PubMedSearcher 的可替换传输层
+# EntrezTransport 直接访问NCBI; RecordingTransport 将原始响应保存到磁盘;
+# ReplayTransport 从磁盘回放响应, 可设置延迟与错误注入, 用于离线基准测试与回归测试
+import hashlib
+import json
+import os
+import random
+import time
+
+# 不影响响应内容的参数, 不参与录制文件的命名
+IGNORED_PARAMS = ('email', 'api_key', 'tool', 'timeout')
+
+
+class TransportError(IOError):
+    """回放模式下注入的网络错误"""
+
+
+def request_key(method, params):
+    """
+    计算请求对应的录制文件名
+
+    Args:
+        method (str): 'esearch' 或 'efetch'
+        params (dict): 请求参数
+
+    Returns:
+        str: 形如 'efetch_<sha1前16位>.xml' 的文件名
+    """
+    relevant = {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS}
+    digest = hashlib.sha1(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return f"{method}_{digest}.xml"
+
+
+def save_response(directory, method, params, body):
+    """
+    将一次请求的原始响应保存到录制目录
+
+    除响应文件外, 在 index.jsonl 中追加一行请求参数, 便于查看录制内容。
+    """
+    os.makedirs(directory, exist_ok=True)
+    filename = request_key(method, params)
+    with open(os.path.join(directory, filename), 'wb') as f:
+        f.write(body)
+    relevant = {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS}
+    with open(os.path.join(directory, 'index.jsonl'), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'method': method, 'params': relevant, 'file': filename},
+                           ensure_ascii=False) + '\n')
+    return filename
+
+
+class EntrezTransport:
+    """直接通过 Bio.Entrez 访问NCBI, 返回原始响应字节"""
+
+    def esearch(self, **params):
+        from Bio import Entrez
+        handle = Entrez.esearch(**params)
+        try:
+            return _as_bytes(handle.read())
+        finally:
+            handle.close()
+
+    def efetch(self, **params):
+        from Bio import Entrez
+        handle = Entrez.efetch(**params)
+        try:
+            return _as_bytes(handle.read())
+        finally:
+            handle.close()
+
+
+class RecordingTransport:
+    """包装另一个传输层, 并将每次响应保存到录制目录"""
+
+    def __init__(self, directory, transport=None):
+        """
+        Args:
+            directory (str): 录制目录
+            transport (optional): 实际发出请求的传输层, 默认 EntrezTransport
+        """
+        self.directory = directory
+        self.transport = transport or EntrezTransport()
+
+    def esearch(self, **params):
+        body = _as_bytes(self.transport.esearch(**params))
+        save_response(self.directory, 'esearch', params, body)
+        return body
+
+    def efetch(self, **params):
+        body = _as_bytes(self.transport.efetch(**params))
+        save_response(self.directory, 'efetch', params, body)
+        return body
+
+
+class ReplayTransport:
+    """从录制目录回放响应, 不访问网络"""
+
+    def __init__(self, directory, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_factory=None, seed=None):
+        """
+        Args:
+            directory (str): 录制目录
+            latency (float): 每次请求的固定延迟(秒)
+            jitter (float): 在固定延迟上附加的 [0, jitter) 随机延迟(秒)
+            error_rate (float): 每次请求抛出注入错误的概率(0-1)
+            error_factory (callable, optional): 接收请求描述字符串并返回异常对象, 默认 TransportError
+            seed (int, optional): 随机种子, 使延迟与错误序列可复现
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"error_rate should be between 0 and 1, got {error_rate}")
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_factory = error_factory or TransportError
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.injected_errors = 0
+
+    def _replay(self, method, params):
+        self.calls += 1
+        delay = self.latency + (self.random.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.injected_errors += 1
+            raise self.error_factory(f"injected error for {method} {params}")
+
+        path = os.path.join(self.directory, request_key(method, params))
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded response for {method} {params} ({path})")
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def esearch(self, **params):
+        return self._replay('esearch', params)
+
+    def efetch(self, **params):
+        return self._replay('efetch', params)
+
+
+def _as_bytes(body):
+    return body.encode('utf-8') if isinstance(body, str) else body
@@ -0,0 +1,175 @@
+# 文献检索流程的性能指标: 各阶段(search/fetch/parse/write)的延迟直方图、重试与失败次数、吞吐量与传输字节数
+# PubMedSearcher.batch_fetch_articles 每个主题生成一份JSON汇总(该主题的检索, 及其文献的获取/解析/写入;
+# 多个主题共有的文献同时计入每个所属主题), 合并语料另有一份
+# 合并语料的耗时为墙钟时间; 各主题的文献穿插在整个运行中获取, 其耗时为各阶段延迟之和(timing字段区分)
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+STAGES = ('search', 'fetch', 'parse', 'write')
+
+# 延迟直方图的桶上界(毫秒), 最后一个桶收集超过10秒的请求
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float('inf'))
+
+
+class LatencyHistogram:
+    """固定桶的延迟直方图"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        """记录一次耗时(秒)"""
+        ms = seconds * 1000
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other):
+        """累加另一个直方图"""
+        if not other.count:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def to_dict(self):
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            if count:
+                buckets['le_inf' if bound == float('inf') else f'le_{bound}ms'] = count
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 6),
+            'mean_s': round(self.total / self.count, 6) if self.count else None,
+            'min_s': round(self.min, 6) if self.min is not None else None,
+            'max_s': round(self.max, 6) if self.max is not None else None,
+            'buckets': buckets
+        }
+
+
+class FetchMetrics:
+    """单个检索主题的流程指标"""
+
+    def __init__(self, topic=None, progress_callback=None, wall_clock=True):
+        """
+        Args:
+            topic (str, optional): 检索主题名
+            progress_callback (callable, optional): 每处理一篇文献后调用, 参数为进度字典
+            wall_clock (bool): 耗时与吞吐量按创建以来的墙钟时间计算; False时按各阶段延迟之和计算
+        """
+        self.topic = topic
+        self.progress_callback = progress_callback
+        self.wall_clock = wall_clock
+        self.latency = {stage: LatencyHistogram() for stage in STAGES}
+        self.bytes_received = Counter()
+        self.retries = Counter()
+        self.failures = Counter()
+        self.records = 0
+        self.failed_records = 0
+        self.expected = 0
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def timed(self, stage):
+        """计时一个阶段的单次操作; 异常按类型计入失败次数后继续抛出"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.failures[f"{stage}:{type(e).__name__}"] += 1
+            raise
+        finally:
+            self.latency[stage].add(time.perf_counter() - start)
+
+    def add_bytes(self, stage, body):
+        """记录一次响应的字节数"""
+        self.bytes_received[stage] += len(body)
+
+    def add_retry(self, stage, error):
+        """按阶段和异常类型记录一次重试"""
+        self.retries[f"{stage}:{type(error).__name__}"] += 1
+
+    def add_record(self):
+        """记录成功获取的一篇文献"""
+        self.records += 1
+
+    def add_failed_record(self):
+        """记录重试用尽后仍未获取的一篇文献"""
+        self.failed_records += 1
+
+    def merge(self, other):
+        """将另一份指标(如单篇文献的指标)累加到本指标, 不影响计时起点与期望数量"""
+        for stage, histogram in other.latency.items():
+            self.latency[stage].merge(histogram)
+        self.bytes_received.update(other.bytes_received)
+        self.retries.update(other.retries)
+        self.failures.update(other.failures)
+        self.records += other.records
+        self.failed_records += other.failed_records
+
+    def progress(self, pmid=None, done=None):
+        """
+        调用进度回调
+
+        Args:
+            pmid (str, optional): 刚处理的PMID
+            done (int, optional): 已处理数量(含失败), 默认使用成功数量
+        """
+        if self.progress_callback is None:
+            return
+        done = self.records if done is None else done
+        elapsed = self.elapsed()
+        rate = done / elapsed if elapsed > 0 else None
+        self.progress_callback({
+            'topic': self.topic,
+            'pmid': pmid,
+            'done': done,
+            'total': self.expected,
+            'records': self.records,
+            'elapsed_s': elapsed,
+            'records_per_s': rate,
+            'eta_s': (self.expected - done) / rate if rate and self.expected else None
+        })
+
+    def elapsed(self):
+        if not self.wall_clock:
+            return sum(histogram.total for histogram in self.latency.values())
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """返回可序列化为JSON的指标汇总"""
+        elapsed = self.elapsed()
+        return {
+            'topic': self.topic,
+            'timing': 'wall_clock' if self.wall_clock else 'stage_latency',
+            'elapsed_s': round(elapsed, 6),
+            'records': self.records,
+            'failed_records': self.failed_records,
+            'expected_records': self.expected,
+            'records_per_s': round(self.records / elapsed, 3) if elapsed > 0 else None,
+            'bytes_received': dict(self.bytes_received),
+            'bytes_per_s': round(sum(self.bytes_received.values()) / elapsed, 1) if elapsed > 0 else None,
+            'retries': dict(self.retries),
+            'failures': dict(self.failures),
+            'latency': {stage: histogram.to_dict() for stage, histogram in self.latency.items()}
+        }
+
+    def write_json(self, path):
+        """将指标汇总写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
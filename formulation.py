@@ -0,0 +1,190 @@
+# 制剂数据的紧凑表示: 单条记录用 __slots__ 类 Formulation, 批量数据用列式存储 FormulationSet
+# semi_qua.py 的评分函数与 validate_weights.py 的加载/统计均直接使用这两种类型
+import numpy as np
+
+# 数值型字段 缺失值统一存为NaN
+NUMERIC_FIELDS = (
+    'particle_size', 'pdi', 'zeta_potential',
+    'toxicity', 'stability', 'cellular_uptake', 'biodistribution',
+    'encapsulation_efficiency', 'fpf', 'mmad'
+)
+
+# 文本型字段 缺失值统一存为None
+TEXT_FIELDS = ('name', 'carrier_type', 'surface_modification', 'refer')
+
+FIELDS = TEXT_FIELDS[:1] + NUMERIC_FIELDS[:3] + TEXT_FIELDS[1:3] + NUMERIC_FIELDS[3:] + TEXT_FIELDS[3:]
+
+# nanocarriers.csv 的列顺序
+NANOCARRIER_COLUMNS = [
+    'name', 'particle_size', 'ps_sd', 'pdi', 'pdi_sd', 'zeta', 'zeta_sd',
+    'carrier_type', 'surface_modify', 'FPF', 'fpf_sd', 'mmad', 'mmad_sd', 'refer', 'NOTE'
+]
+
+
+def _is_missing(value):
+    """判断单个值是否为缺失值(None/NaN/'NA'/空字符串)"""
+    if value is None:
+        return True
+    if isinstance(value, float) and value != value:
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('', 'na'):
+        return True
+    return False
+
+
+class Formulation:
+    """单条纳米制剂记录, 字段与 calculate_score 的参数一一对应"""
+
+    __slots__ = FIELDS
+
+    def __init__(self, name='', particle_size=None, pdi=None, zeta_potential=None,
+                 carrier_type=None, surface_modification=None, toxicity=None, stability=None,
+                 cellular_uptake=None, biodistribution=None, encapsulation_efficiency=None,
+                 fpf=None, mmad=None, refer=None):
+        self.name = name
+        self.particle_size = particle_size
+        self.pdi = pdi
+        self.zeta_potential = zeta_potential
+        self.carrier_type = carrier_type
+        self.surface_modification = surface_modification
+        self.toxicity = toxicity
+        self.stability = stability
+        self.cellular_uptake = cellular_uptake
+        self.biodistribution = biodistribution
+        self.encapsulation_efficiency = encapsulation_efficiency
+        self.fpf = fpf
+        self.mmad = mmad
+        self.refer = refer
+
+    def __repr__(self):
+        values = ', '.join(f"{field}={getattr(self, field)!r}" for field in FIELDS
+                           if getattr(self, field) is not None)
+        return f"Formulation({values})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Formulation):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+
+class FormulationSet:
+    """
+    列式存储的制剂集合
+
+    数值字段保存为float64数组(缺失为NaN), 文本字段保存为object数组(缺失为None),
+    批量评分与相关性统计直接在列上运算, 不再逐条构造字典。
+    """
+
+    __slots__ = ('_columns', '_size')
+
+    def __init__(self, columns, size):
+        self._columns = columns
+        self._size = size
+
+    @classmethod
+    def from_columns(cls, **columns):
+        """
+        由列数据构造集合
+
+        Args:
+            **columns: 字段名到序列的映射, 未提供的字段视为全部缺失
+
+        Returns:
+            FormulationSet: 制剂集合
+        """
+        unknown = set(columns) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown formulation fields: {sorted(unknown)}")
+
+        sizes = {len(values) for values in columns.values()}
+        if len(sizes) > 1:
+            raise ValueError(f"All columns must have the same length, got {sorted(sizes)}")
+        size = sizes.pop() if sizes else 0
+
+        data = {}
+        for field in NUMERIC_FIELDS:
+            if field in columns:
+                values = columns[field]
+                if isinstance(values, np.ndarray) and values.dtype.kind in 'fiu':
+                    data[field] = values.astype(np.float64, copy=True)
+                else:
+                    data[field] = np.array(
+                        [np.nan if _is_missing(v) else float(v) for v in values],
+                        dtype=np.float64
+                    )
+            else:
+                data[field] = np.full(size, np.nan)
+        for field in TEXT_FIELDS:
+            column = np.empty(size, dtype=object)
+            if field in columns:
+                column[:] = [None if _is_missing(v) else v for v in columns[field]]
+            elif field == 'name':
+                column[:] = ''
+            data[field] = column
+        return cls(data, size)
+
+    @classmethod
+    def from_formulations(cls, formulations):
+        """由 Formulation 对象序列构造集合"""
+        formulations = list(formulations)
+        return cls.from_columns(**{
+            field: [getattr(form, field) for form in formulations] for field in FIELDS
+        })
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._record(i)
+
+    def __getitem__(self, key):
+        """
+        字符串取列, 整数取单条记录, 切片/布尔掩码/索引数组取子集
+        """
+        if isinstance(key, str):
+            return self._columns[key]
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self._size
+            if not 0 <= key < self._size:
+                raise IndexError("FormulationSet index out of range")
+            return self._record(key)
+        columns = {field: values[key] for field, values in self._columns.items()}
+        return FormulationSet(columns, len(columns['name']))
+
+    def __repr__(self):
+        return f"FormulationSet({self._size} formulations)"
+
+    def _record(self, i):
+        values = {}
+        for field in NUMERIC_FIELDS:
+            value = self._columns[field][i]
+            values[field] = None if np.isnan(value) else float(value)
+        for field in TEXT_FIELDS:
+            values[field] = self._columns[field][i]
+        return Formulation(**values)
+
+    def column(self, field):
+        """返回指定字段的列数组(不复制)"""
+        return self._columns[field]
+
+    def set_column(self, field, values):
+        """替换指定字段的列数据, 长度须与集合一致"""
+        if field not in self._columns:
+            raise ValueError(f"Unknown formulation field: {field}")
+        if len(values) != self._size:
+            raise ValueError(f"Column length {len(values)} does not match set size {self._size}")
+        if field in NUMERIC_FIELDS:
+            self._columns[field] = np.asarray(values, dtype=np.float64)
+        else:
+            column = np.empty(self._size, dtype=object)
+            column[:] = list(values)
+            self._columns[field] = column
+
+    def present(self, field):
+        """返回指定字段非缺失的布尔掩码"""
+        values = self._columns[field]
+        if field in NUMERIC_FIELDS:
+            return ~np.isnan(values)
+        return np.array([v is not None for v in values], dtype=bool)
@@ -82,78 +82,89 @@ def process_file(file, reader):
                 parameter_counts[param] += count
                 category_counts[param_to_category.get(param, 'unknown')] += count
 
-# 尝试不同编码读取CSV文件
-try:
-    # 读取CSV文件并进行分析 - 使用errors='replace'参数处理编码错误
-    with open('../data/combined_query_literature.csv', 'r', encoding='utf-8', errors='replace') as file:
-        reader = csv.DictReader(file)
-        process_file(file, reader)
-except UnicodeDecodeError:
-    # 如果UTF-8解码失败，尝试使用Latin-1编码
-    with open('../data/combined_query_literature.csv', 'r', encoding='latin-1') as file:
-        reader = csv.DictReader(file)
-        process_file(file, reader)
-except FileNotFoundError:
-    print("错误: 找不到数据文件 '../data/combined_query_literature.csv'")
-    exit(1)
-except Exception as e:
-    print(f"发生错误: {str(e)}")
-    exit(1)
+def reset_counters():
+    """清空计数器, 便于对多个语料重复统计"""
+    parameter_counts.clear()
+    category_counts.clear()
+    years.clear()
 
-# 计算每个类别内参数的相对权重
-category_weights = {}
-for category, params in parameter_categories.items():
-    category_total = sum(parameter_counts[param] for param in params)
-    if category_total > 0:
-        category_weights[category] = {param: parameter_counts[param]/category_total for param in params if parameter_counts[param] > 0}
+def main():
+    """读取文献CSV, 统计关键参数并输出权重矩阵"""
+    # 尝试不同编码读取CSV文件
+    try:
+        # 读取CSV文件并进行分析 - 使用errors='replace'参数处理编码错误
+        with open('../data/combined_query_literature.csv', 'r', encoding='utf-8', errors='replace') as file:
+            reader = csv.DictReader(file)
+            process_file(file, reader)
+    except UnicodeDecodeError:
+        # 如果UTF-8解码失败，尝试使用Latin-1编码
+        with open('../data/combined_query_literature.csv', 'r', encoding='latin-1') as file:
+            reader = csv.DictReader(file)
+            process_file(file, reader)
+    except FileNotFoundError:
+        print("错误: 找不到数据文件 '../data/combined_query_literature.csv'")
+        exit(1)
+    except Exception as e:
+        print(f"发生错误: {str(e)}")
+        exit(1)
+
+    # 计算每个类别内参数的相对权重
+    category_weights = {}
+    for category, params in parameter_categories.items():
+        category_total = sum(parameter_counts[param] for param in params)
+        if category_total > 0:
+            category_weights[category] = {param: parameter_counts[param]/category_total for param in params if parameter_counts[param] > 0}
+
+    # 计算各类别的权重
+    total_mentions = sum(category_counts.values())
+    category_relative_weights = {}
+    if total_mentions > 0:
+        category_relative_weights = {cat: count/total_mentions for cat, count in category_counts.items()}
 
-# 计算各类别的权重
-total_mentions = sum(category_counts.values())
-category_relative_weights = {}
-if total_mentions > 0:
-    category_relative_weights = {cat: count/total_mentions for cat, count in category_counts.items()}
+    # 输出年份分布
+    if years:
+        min_year = min(years)
+        max_year = max(years)
+        year_counts = Counter(years)
+        print(f'年份分布: {min_year}-{max_year}')
+        year_ranges = [(2000, 2005), (2006, 2010), (2011, 2015), (2016, 2020), (2021, 2025)]
+        for start, end in year_ranges:
+            count = sum(year_counts[y] for y in range(start, end+1) if y in year_counts)
+            print(f'{start}-{end}: {count} 文献')
 
-# 输出年份分布
-if years:
-    min_year = min(years)
-    max_year = max(years)
-    year_counts = Counter(years)
-    print(f'年份分布: {min_year}-{max_year}')
-    year_ranges = [(2000, 2005), (2006, 2010), (2011, 2015), (2016, 2020), (2021, 2025)]
-    for start, end in year_ranges:
-        count = sum(year_counts[y] for y in range(start, end+1) if y in year_counts)
-        print(f'{start}-{end}: {count} 文献')
+    # 输出类别权重
+    print('\n类别权重:')
+    for category, weight in sorted(category_relative_weights.items(), key=lambda x: x[1], reverse=True):
+        print(f'{category}: {weight:.3f}')
 
-# 输出类别权重
-print('\n类别权重:')
-for category, weight in sorted(category_relative_weights.items(), key=lambda x: x[1], reverse=True):
-    print(f'{category}: {weight:.3f}')
+    # 输出参数权重
+    print('\n参数权重:')
+    for param, count in sorted(parameter_counts.items(), key=lambda x: x[1], reverse=True)[:20]:
+        category = param_to_category.get(param, 'unknown')
+        print(f'{param} ({category}): {count}')
 
-# 输出参数权重
-print('\n参数权重:')
-for param, count in sorted(parameter_counts.items(), key=lambda x: x[1], reverse=True)[:20]:
-    category = param_to_category.get(param, 'unknown')
-    print(f'{param} ({category}): {count}')
+    # 输出权重矩阵
+    print('\n权重矩阵:')
+    print('类别,相对权重,参数,参数权重')
+    for category, weight in sorted(category_relative_weights.items(), key=lambda x: x[1], reverse=True):
+        if category in category_weights:
+            cat_params = category_weights[category]
+            for param, param_weight in sorted(cat_params.items(), key=lambda x: x[1], reverse=True):
+                print(f'{category},{weight:.3f},{param},{param_weight:.3f}')
 
-# 输出权重矩阵
-print('\n权重矩阵:')
-print('类别,相对权重,参数,参数权重')
-for category, weight in sorted(category_relative_weights.items(), key=lambda x: x[1], reverse=True):
-    if category in category_weights:
-        cat_params = category_weights[category]
-        for param, param_weight in sorted(cat_params.items(), key=lambda x: x[1], reverse=True):
-            print(f'{category},{weight:.3f},{param},{param_weight:.3f}')
+    # 将结果保存到文件
+    try:
+        with open('keyword_weights.csv', 'w', encoding='utf-8') as f:
+            f.write('类别,相对权重,参数,参数权重\n')
+            for category, weight in sorted(category_relative_weights.items(), key=lambda x: x[1], reverse=True):
+                if category in category_weights:
+                    cat_params = category_weights[category]
+                    for param, param_weight in sorted(cat_params.items(), key=lambda x: x[1], reverse=True):
+                        f.write(f'{category},{weight:.3f},{param},{param_weight:.3f}\n')
+    except IOError as e:
+        print(f"保存结果文件时发生错误: {str(e)}")
+    except Exception as e:
+        print(f"发生未知错误: {str(e)}")
 
-# 将结果保存到文件
-try:
-    with open('keyword_weights.csv', 'w', encoding='utf-8') as f:
-        f.write('类别,相对权重,参数,参数权重\n')
-        for category, weight in sorted(category_relative_weights.items(), key=lambda x: x[1], reverse=True):
-            if category in category_weights:
-                cat_params = category_weights[category]
-                for param, param_weight in sorted(cat_params.items(), key=lambda x: x[1], reverse=True):
-                    f.write(f'{category},{weight:.3f},{param},{param_weight:.3f}\n')
-except IOError as e:
-    print(f"保存结果文件时发生错误: {str(e)}")
-except Exception as e:
-    print(f"发生未知错误: {str(e)}")
+if __name__ == "__main__":
+    main()
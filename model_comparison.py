@@ -0,0 +1,429 @@
+# 评分与性能指标(FPF/MMAD)的预测模型对比: 线性回归(评分) / 保序回归(评分) / kNN与核岭回归(参数分向量)
+# 每个模型用留一法(LOO)和k折交叉验证评估; LOO尽量不逐点重新拟合:
+#   linear: 帽子矩阵闭式解  isotonic: 方向按相关系数符号选择, 只在被删除点所在区块附近增量重做PAVA
+#   knn: 一次距离矩阵, 屏蔽自身(或同折)即可  kernel_ridge: 一次特征分解, 每个正则系数O(n^2)
+# 权重搜索中评分变化时只需重算 linear/isotonic; 参数分向量与权重无关, 距离矩阵和特征分解可复用
+import numpy as np
+
+from semi_qua import SCORED_PARAMETERS, parameter_scores
+
+MODELS = ('linear', 'isotonic', 'knn', 'kernel_ridge')
+
+DEFAULT_FOLDS = 5
+DEFAULT_NEIGHBORS = 3
+# 核岭回归的正则系数; RBF核宽度默认 1/参数个数
+DEFAULT_ALPHA = 1.0
+
+
+def feature_matrix(formulations):
+    """
+    制剂集合 -> 参数分矩阵(n x 参数个数), 列顺序同 SCORED_PARAMETERS
+
+    可选参数缺失(NaN)处用该列已有评分的均值填充, 整列缺失时填0。
+    """
+    scores = parameter_scores(formulations)
+    features = np.column_stack([scores[param] for param in SCORED_PARAMETERS])
+    missing = np.isnan(features)
+    if missing.any():
+        counts = (~missing).sum(axis=0)
+        means = np.divide(np.where(missing, 0.0, features).sum(axis=0), counts,
+                          out=np.zeros(features.shape[1]), where=counts > 0)
+        features = np.where(missing, means, features)
+    return features
+
+
+def fold_assignments(n, folds=DEFAULT_FOLDS, seed=0):
+    """随机划分k折, 返回每个样本的折编号; folds不小于n时等价于留一法"""
+    if folds < 2:
+        raise ValueError(f"Cross-validation needs at least 2 folds, got {folds}")
+    folds = min(folds, n)
+    order = np.random.default_rng(seed).permutation(n)
+    assignment = np.empty(n, dtype=np.int64)
+    assignment[order] = np.arange(n) % folds
+    return assignment
+
+
+def prediction_metrics(y, predictions):
+    """
+    交叉验证预测的误差指标
+
+    Returns:
+        dict: rmse, mae, q2(预测R², 1 - PRESS/总平方和)
+    """
+    residuals = y - predictions
+    total = np.sum((y - y.mean()) ** 2)
+    press = np.sum(residuals ** 2)
+    return {
+        'rmse': float(np.sqrt(np.mean(residuals ** 2))),
+        'mae': float(np.mean(np.abs(residuals))),
+        'q2': float(1 - press / total) if total > 0 else None
+    }
+
+
+# ---------- 线性回归(评分) ----------
+
+def linear_fit(x, y):
+    """最小二乘拟合 y = a + b*x, 返回(a, b); x无变化时 b=0"""
+    x_mean = x.mean()
+    sxx = np.sum((x - x_mean) ** 2)
+    slope = np.sum((x - x_mean) * (y - y.mean())) / sxx if sxx > 0 else 0.0
+    return y.mean() - slope * x_mean, slope
+
+
+def linear_loo(x, y):
+    """
+    线性回归的留一预测: 残差 e_i / (1 - h_ii)
+
+    删除某点后其余评分全部相同时(h_ii = 1)斜率为0, 预测为其余样本的均值。
+    """
+    n = len(y)
+    intercept, slope = linear_fit(x, y)
+    x_mean = x.mean()
+    sxx = np.sum((x - x_mean) ** 2)
+    leverage = 1 / n + ((x - x_mean) ** 2 / sxx if sxx > 0 else 0.0)
+    residuals = y - (intercept + slope * x)
+    degenerate = 1 - leverage < 1e-9
+    predictions = y - residuals / np.where(degenerate, 1.0, 1 - leverage)
+    predictions[degenerate] = (y.sum() - y[degenerate]) / (n - 1)
+    return predictions
+
+
+def linear_cv(x, y, assignment):
+    """线性回归的k折预测"""
+    predictions = np.empty(len(y))
+    for fold in np.unique(assignment):
+        test = assignment == fold
+        intercept, slope = linear_fit(x[~test], y[~test])
+        predictions[test] = intercept + slope * x[test]
+    return predictions
+
+
+# ---------- 保序回归(评分) ----------
+# 方向由训练数据的相关系数符号决定: FPF随评分升高, MMAD通常随评分降低; 递减拟合等价于对 -y 做递增拟合
+
+def _increasing(x, y):
+    """训练数据中y是否随x非递减(协方差符号)"""
+    return np.sum((x - x.mean()) * (y - y.mean())) >= 0
+
+
+def _group_by_x(x, y):
+    """合并相同x的样本, 返回(唯一x, 各组y之和, 各组样本数, 每个样本的组编号)"""
+    unique_x, group = np.unique(x, return_inverse=True)
+    sums = np.bincount(group, weights=y, minlength=len(unique_x))
+    counts = np.bincount(group, minlength=len(unique_x)).astype(np.float64)
+    return unique_x, sums, counts, group
+
+
+def _pava(sums, weights):
+    """
+    加权PAVA(非递减)
+
+    Returns:
+        tuple: (区块起始组编号, 区块y之和, 区块权重), 区块均值非递减
+    """
+    starts, block_sums, block_weights = [], [], []
+    for j, (s, w) in enumerate(zip(sums, weights)):
+        start = j
+        while block_sums and block_sums[-1] * w > s * block_weights[-1]:
+            s += block_sums.pop()
+            w += block_weights.pop()
+            start = starts.pop()
+        starts.append(start)
+        block_sums.append(s)
+        block_weights.append(w)
+    return np.array(starts), np.array(block_sums), np.array(block_weights)
+
+
+def isotonic_fit(x, y, increasing=None):
+    """
+    保序回归
+
+    Args:
+        increasing (bool, optional): True为非递减, False为非递增, None按相关系数符号自动选择
+
+    Returns:
+        tuple: (唯一x, 对应拟合值); 用 isotonic_predict 预测
+    """
+    if increasing is None:
+        increasing = _increasing(x, y)
+    sign = 1.0 if increasing else -1.0
+    unique_x, sums, counts, _ = _group_by_x(x, sign * y)
+    starts, block_sums, block_weights = _pava(sums, counts)
+    lengths = np.diff(np.append(starts, len(unique_x)))
+    return unique_x, sign * np.repeat(block_sums / block_weights, lengths)
+
+
+def isotonic_predict(model, x):
+    """拟合点之间线性插值, 范围外取端点值"""
+    unique_x, fitted = model
+    return np.interp(x, unique_x, fitted)
+
+
+def isotonic_cv(x, y, assignment, increasing=None):
+    """保序回归的k折预测, 方向为None时按每折训练数据选择"""
+    predictions = np.empty(len(y))
+    for fold in np.unique(assignment):
+        test = assignment == fold
+        predictions[test] = isotonic_predict(isotonic_fit(x[~test], y[~test], increasing), x[test])
+    return predictions
+
+
+def isotonic_loo(x, y, increasing=None):
+    """
+    保序回归的留一预测, 与逐点删除后重新拟合的结果一致
+
+    方向为None时按删除该点后的协方差符号选择(每点O(1)更新)。
+    """
+    n = len(y)
+    if n < 2:
+        raise ValueError("Leave-one-out needs at least 2 samples")
+    if increasing is None:
+        # 删除第i点后的 Σ(x-x̄)(y-ȳ) = Σxy - x_i·y_i - (Σx - x_i)(Σy - y_i)/(n-1)
+        rest_cov = np.sum(x * y) - x * y - (x.sum() - x) * (y.sum() - y) / (n - 1)
+        up = rest_cov >= 0
+    else:
+        up = np.full(n, bool(increasing))
+    predictions = np.empty(n)
+    if up.any():
+        predictions[up] = _isotonic_loo_increasing(x, y)[up]
+    if not up.all():
+        predictions[~up] = -_isotonic_loo_increasing(x, -y)[~up]
+    return predictions
+
+
+def _isotonic_loo_increasing(x, y):
+    """
+    非递减保序回归的留一预测
+
+    全量拟合的其它区块在删除一个点后仍可整体作为加权点参与PAVA,
+    因此只需从被删除点所在区块开始重做合并, 向左/向右只在违反单调性时吸收相邻区块。
+    删除后区块不拆分且不与相邻区块合并时(最常见), 用区块内前缀和向量化判断并直接得到结果。
+    """
+    n = len(y)
+    unique_x, sums, counts, group = _group_by_x(x, y)
+    m = len(unique_x)
+    starts, block_sums, block_weights = _pava(sums, counts)
+    ends = np.append(starts[1:], m)
+    block_means = block_sums / block_weights
+    block_of_group = np.repeat(np.arange(len(starts)), ends - starts)
+    fitted = block_means[block_of_group]
+    prefix_sums = np.cumsum(sums)
+    prefix_counts = np.cumsum(counts)
+
+    predictions = np.empty(n)
+    for i in range(n):
+        g = group[i]
+        b = block_of_group[g]
+        start, end = starts[b], ends[b]
+        total_s, total_w = block_sums[b] - y[i], block_weights[b] - 1
+
+        if total_w > 0:
+            # 删除后区块保持为一块: 每个真前缀的均值都不低于整体均值
+            offset_s = prefix_sums[start - 1] if start > 0 else 0.0
+            offset_w = prefix_counts[start - 1] if start > 0 else 0.0
+            removed = np.arange(start, end - 1) >= g
+            prefix_s = prefix_sums[start:end - 1] - offset_s - np.where(removed, y[i], 0.0)
+            prefix_w = prefix_counts[start:end - 1] - offset_w - removed
+            mean = total_s / total_w
+            single = np.all((prefix_w == 0) | (prefix_s * total_w >= total_s * prefix_w))
+            if (single and (b == 0 or block_means[b - 1] <= mean)
+                    and (b == len(starts) - 1 or mean <= block_means[b + 1])):
+                if counts[g] > 1:
+                    predictions[i] = mean
+                    continue
+                neighbours = [j for j in (g - 1, g + 1) if 0 <= j < m]
+                values = [mean if start <= j < end else fitted[j] for j in neighbours]
+                if len(neighbours) == 1:
+                    predictions[i] = values[0]
+                else:
+                    predictions[i] = np.interp(x[i], unique_x[neighbours], values)
+                continue
+
+        predictions[i] = _refit_block(i, g, b, x, y, unique_x, sums, counts, starts, ends,
+                                      block_sums, block_weights, fitted)
+    return predictions
+
+
+def _refit_block(i, g, b, x, y, unique_x, sums, counts, starts, ends, block_sums, block_weights, fitted):
+    """删除样本i后从其所在区块重做PAVA, 返回其预测值"""
+    m = len(unique_x)
+    # 局部栈: [y之和, 权重, 起始组, 结束组(不含)]
+    stack = []
+    left = b  # 左侧尚未被吸收的区块数
+
+    def push(s, w, start, end):
+        nonlocal left
+        merged = False
+        while True:
+            if stack and stack[-1][0] * w > s * stack[-1][1]:
+                top = stack.pop()
+                s, w, start = s + top[0], w + top[1], top[2]
+            elif not stack and left > 0 and block_sums[left - 1] * w > s * block_weights[left - 1]:
+                left -= 1
+                s, w, start = s + block_sums[left], w + block_weights[left], starts[left]
+            else:
+                break
+            merged = True
+        stack.append([s, w, start, end])
+        return merged
+
+    for j in range(starts[b], ends[b]):
+        s, w = sums[j], counts[j]
+        if j == g:
+            s, w = s - y[i], w - 1
+            if w == 0:
+                continue
+        push(s, w, j, j + 1)
+    for r in range(b + 1, len(starts)):
+        if not push(block_sums[r], block_weights[r], starts[r], ends[r]):
+            break
+
+    def value(j):
+        for s, w, start, end in stack:
+            if start <= j < end:
+                return s / w
+        return fitted[j]
+
+    if counts[g] > 1:
+        return value(g)
+    if g == 0:
+        return value(1)
+    if g == m - 1:
+        return value(m - 2)
+    return np.interp(x[i], unique_x[[g - 1, g + 1]], [value(g - 1), value(g + 1)])
+
+
+# ---------- kNN(参数分向量) ----------
+
+def squared_distances(features):
+    """样本两两之间的欧氏距离平方"""
+    norms = np.einsum('ij,ij->i', features, features)
+    distances = norms[:, None] + norms[None, :] - 2 * features @ features.T
+    return np.maximum(distances, 0.0)
+
+
+def _knn_masked(distances, y, excluded, neighbors):
+    """
+    每行在未被屏蔽的样本中取最近的neighbors个, 返回其y均值
+
+    参数分为小整数, 等距样本很常见; 按(距离, 样本序号)取前neighbors个, 结果与删除样本后重新排序一致。
+    """
+    masked = np.where(excluded, np.inf, distances)
+    available = (~excluded).sum(axis=1)
+    k = int(min(neighbors, available.min()))
+    if k < 1:
+        raise ValueError("No training samples left for kNN")
+    kth = np.partition(masked, k - 1, axis=1)[:, k - 1:k]
+    closer = masked < kth
+    tied = masked == kth
+    # 与第k近距离相同的样本按序号补足k个
+    chosen = closer | (tied & (np.cumsum(tied, axis=1) <= k - closer.sum(axis=1, keepdims=True)))
+    return (chosen @ y) / k
+
+
+def knn_loo(distances, y, neighbors=DEFAULT_NEIGHBORS):
+    """kNN的留一预测: 屏蔽距离矩阵的对角线"""
+    return _knn_masked(distances, y, np.eye(len(y), dtype=bool), neighbors)
+
+
+def knn_cv(distances, y, assignment, neighbors=DEFAULT_NEIGHBORS):
+    """kNN的k折预测: 屏蔽同一折的样本"""
+    return _knn_masked(distances, y, assignment[:, None] == assignment[None, :], neighbors)
+
+
+# ---------- 核岭回归(参数分向量, RBF核, 不惩罚截距) ----------
+
+def rbf_kernel(distances, gamma):
+    return np.exp(-gamma * distances)
+
+
+def kernel_eigen(kernel):
+    """核矩阵特征分解, 供 kernel_ridge_loo 在多个正则系数/多个指标间复用"""
+    return np.linalg.eigh(kernel)
+
+
+def kernel_ridge_loo(eigen, y, alphas=(DEFAULT_ALPHA,)):
+    """
+    核岭回归的留一预测(闭式解)
+
+    记 M = K + αI, u = M⁻¹1, v = M⁻¹y, b = Σv/Σu, 则留一残差为
+    (v_i - b·u_i) / ((M⁻¹)_ii - u_i²/Σu)。
+
+    Args:
+        eigen (tuple): kernel_eigen 的结果
+        y (numpy.ndarray): 目标值
+        alphas (sequence): 正则系数
+
+    Returns:
+        numpy.ndarray: 形状(len(alphas), n)的留一预测
+    """
+    values, vectors = eigen
+    y_rotated = vectors.T @ y
+    ones_rotated = vectors.sum(axis=0)
+    squared = vectors ** 2
+    predictions = np.empty((len(alphas), len(y)))
+    for row, alpha in enumerate(alphas):
+        inverse = 1 / (values + alpha)
+        u = vectors @ (inverse * ones_rotated)
+        v = vectors @ (inverse * y_rotated)
+        u_total = u.sum()
+        intercept = v.sum() / u_total
+        diagonal = squared @ inverse
+        predictions[row] = y - (v - intercept * u) / (diagonal - u ** 2 / u_total)
+    return predictions
+
+
+def kernel_ridge_fit(kernel, y, alpha=DEFAULT_ALPHA):
+    """拟合核岭回归, 返回(截距, 系数)"""
+    system = kernel + alpha * np.eye(len(y))
+    u, v = np.linalg.solve(system, np.column_stack([np.ones(len(y)), y])).T
+    intercept = v.sum() / u.sum()
+    return intercept, v - intercept * u
+
+
+def kernel_ridge_cv(kernel, y, assignment, alpha=DEFAULT_ALPHA):
+    """核岭回归的k折预测"""
+    predictions = np.empty(len(y))
+    for fold in np.unique(assignment):
+        test = assignment == fold
+        intercept, coef = kernel_ridge_fit(kernel[np.ix_(~test, ~test)], y[~test], alpha)
+        predictions[test] = intercept + kernel[np.ix_(test, ~test)] @ coef
+    return predictions
+
+
+def compare_models(scores, features, y, folds=DEFAULT_FOLDS, seed=0,
+                   neighbors=DEFAULT_NEIGHBORS, alpha=DEFAULT_ALPHA, gamma=None):
+    """
+    用留一法和k折交叉验证比较各模型对性能指标的预测
+
+    Args:
+        scores (numpy.ndarray): 综合评分(linear/isotonic的输入)
+        features (numpy.ndarray): 参数分矩阵(knn/kernel_ridge的输入), 见 feature_matrix
+        y (numpy.ndarray): 性能指标(FPF或MMAD), 不含缺失值
+        folds (int): k折交叉验证的折数
+        seed (int): 划分折的随机种子
+        neighbors (int): kNN的邻居数
+        alpha (float): 核岭回归的正则系数
+        gamma (float, optional): RBF核宽度, 默认 1/参数个数
+
+    Returns:
+        dict: 模型名 -> {'loo': 指标, 'kfold': 指标}, 指标见 prediction_metrics
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) < 3:
+        raise ValueError("Model comparison needs at least 3 samples")
+    scores = np.asarray(scores, dtype=np.float64)
+    gamma = 1 / features.shape[1] if gamma is None else gamma
+    assignment = fold_assignments(len(y), folds, seed)
+    distances = squared_distances(features)
+    kernel = rbf_kernel(distances, gamma)
+
+    predictions = {
+        'linear': (linear_loo(scores, y), linear_cv(scores, y, assignment)),
+        'isotonic': (isotonic_loo(scores, y), isotonic_cv(scores, y, assignment)),
+        'knn': (knn_loo(distances, y, neighbors), knn_cv(distances, y, assignment, neighbors)),
+        'kernel_ridge': (kernel_ridge_loo(kernel_eigen(kernel), y, [alpha])[0],
+                         kernel_ridge_cv(kernel, y, assignment, alpha)),
+    }
+    return {model: {'loo': prediction_metrics(y, loo), 'kfold': prediction_metrics(y, kfold)}
+            for model, (loo, kfold) in predictions.items()}
@@ -0,0 +1,281 @@
+# 多目标(Pareto)排序: 保留各类别子评分(physical/carrier/biological/delivery/drug)与实测FPF/MMAD,
+# 用非支配排序分层, 筛选结果为逐层的Pareto前沿而不是单一排序列表
+# 用法: python pareto_ranking.py -i nanocarriers.csv [-o ranked.csv] [-p literature] [--objectives physical,carrier,fpf]
+import argparse
+import csv
+import os
+from bisect import bisect_left
+
+import numpy as np
+
+from semi_qua import CATEGORIES, category_scores, score_formulations
+
+# 实测指标目标: FPF越大越好; MMAD以偏离理想范围(1-5 μm)的距离取负, 越接近范围越好
+METRIC_OBJECTIVES = ('fpf', 'mmad')
+OBJECTIVES = tuple(CATEGORIES) + METRIC_OBJECTIVES
+
+MMAD_RANGE = (1, 5)
+
+# 非支配排序每批处理的点数, 以及二分查找时单次向量化比较的最大点对数
+BATCH_SIZE = 256
+PAIR_BUDGET = 2 * 10 ** 6
+
+
+def objective_matrix(formulations, application=None, objectives=OBJECTIVES):
+    """
+    制剂集合 -> 目标矩阵(值越大越好)
+
+    所有制剂均缺失的目标(如数据中没有毒性/包封率等列)会被丢弃。
+
+    Args:
+        formulations (FormulationSet): 制剂集合
+        application (str, optional): 应用类型或权重方案名
+        objectives (sequence): 目标名, 取自 OBJECTIVES
+
+    Returns:
+        tuple: (保留的目标名列表, n x 目标数 的矩阵; 缺失值为NaN)
+    """
+    unknown = [name for name in objectives if name not in OBJECTIVES]
+    if unknown:
+        raise ValueError(f"Unknown objectives {unknown}; available: {list(OBJECTIVES)}")
+
+    categories = category_scores(formulations, application)
+    columns = {}
+    for name in objectives:
+        if name == 'fpf':
+            values = formulations['fpf']
+        elif name == 'mmad':
+            mmad = formulations['mmad']
+            low, high = MMAD_RANGE
+            values = np.minimum(np.minimum(mmad - low, high - mmad), 0.0)
+        else:
+            values = categories[name]
+        if not np.all(np.isnan(values)):
+            columns[name] = values.astype(np.float64)
+
+    if not columns:
+        return [], np.empty((len(formulations), 0))
+    return list(columns), np.column_stack(list(columns.values()))
+
+
+def non_dominated_sort(objectives, batch_size=BATCH_SIZE):
+    """
+    非支配排序(值越大越好), 返回每行所在的前沿层(0为Pareto最优层)
+
+    先合并重复的目标向量并按字典序从大到小排列: 排在前面的点不可能被后面的点支配,
+    且第一个目标无需再比较。每个点的层号为支配它的点中最大层号加1,
+    "被第k层支配"对k单调, 可在已有各层上二分查找。缺失值(NaN)视为最差。
+    不超过3个目标时每层只需保存其余目标上的阶梯, 总耗时O(n log n);
+    更多目标时按批次处理: 批内各点同步二分查找, 再按批内的支配关系修正层号,
+    耗时随前沿大小增长, 大部分点互不支配时接近O(n^2)。
+
+    Args:
+        objectives (numpy.ndarray): n x 目标数 的矩阵
+        batch_size (int): 每批处理的点数
+
+    Returns:
+        numpy.ndarray: 每行的前沿层编号
+    """
+    values = np.where(np.isnan(objectives), -np.inf, np.asarray(objectives, dtype=np.float64))
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+    if values.shape[1] == 0:
+        return np.zeros(len(values), dtype=np.int64)
+
+    # np.unique按字典序升序返回, 倒序即为降序
+    unique, inverse = np.unique(values, axis=0, return_inverse=True)
+    rest = np.ascontiguousarray(unique[::-1, 1:])
+    if rest.shape[1] <= 2:
+        front = _staircase_sort(rest)
+        return front[::-1][inverse.ravel()]
+    front = np.empty(len(rest), dtype=np.int64)
+
+    # 已放入的点按层号排序存放, offsets[k]:offsets[k+1] 为第k层
+    placed = np.empty((0, rest.shape[1]))
+    placed_front = np.empty(0, dtype=np.int64)
+    offsets = np.zeros(1, dtype=np.int64)
+
+    for begin in range(0, len(rest), batch_size):
+        batch = rest[begin:begin + batch_size]
+        layers = _first_free_layer(batch, placed, offsets)
+
+        # 批内支配关系: 排在前面且其余目标均不小于
+        within = np.all(batch[None, :, :] >= batch[:, None, :], axis=2)
+        within &= np.tri(len(batch), k=-1, dtype=bool)
+        for i in np.flatnonzero(within.any(axis=1)):
+            layers[i] = max(layers[i], layers[:i][within[i, :i]].max() + 1)
+        front[begin:begin + len(batch)] = layers
+
+        order = np.argsort(layers, kind='stable')
+        positions = np.searchsorted(placed_front, layers[order], side='right')
+        placed = np.insert(placed, positions, batch[order], axis=0)
+        placed_front = np.insert(placed_front, positions, layers[order])
+        offsets = np.searchsorted(placed_front, np.arange(placed_front[-1] + 2))
+
+    return front[::-1][inverse.ravel()]
+
+
+def _staircase_sort(rest):
+    """
+    不超过2个剩余目标时的逐点分层
+
+    同层中被后放入的点在剩余目标上支配的点不会再是唯一的支配者, 可以删除,
+    因此每层保存一条阶梯: 第一个剩余目标升序, 第二个严格降序;
+    判断是否被该层支配只需在阶梯上二分查找。
+    """
+    if rest.shape[1] < 2:  # 补常数列, 不改变支配关系
+        rest = np.column_stack([rest, np.zeros((len(rest), 2 - rest.shape[1]))])
+    keys, heights = [], []  # 每层阶梯的第一/第二剩余目标
+    front = np.empty(len(rest), dtype=np.int64)
+    for index, (key, height) in enumerate(rest.tolist()):
+        low, high = 0, len(keys)
+        while low < high:
+            mid = (low + high) // 2
+            position = bisect_left(keys[mid], key)
+            if position < len(keys[mid]) and heights[mid][position] >= height:
+                low = mid + 1
+            else:
+                high = mid
+        front[index] = low
+        if low == len(keys):
+            keys.append([key])
+            heights.append([height])
+            continue
+        layer_keys, layer_heights = keys[low], heights[low]
+        position = bisect_left(layer_keys, key)
+        end = position + 1 if position < len(layer_keys) and layer_keys[position] == key else position
+        while position > 0 and layer_heights[position - 1] <= height:
+            position -= 1
+        layer_keys[position:end] = [key]
+        layer_heights[position:end] = [height]
+    return front
+
+
+def _first_free_layer(points, placed, offsets):
+    """对每个点二分查找第一个不含其支配点的层; 同一轮查找的点合并为一次向量化比较"""
+    low = np.zeros(len(points), dtype=np.int64)
+    high = np.full(len(points), len(offsets) - 1, dtype=np.int64)
+    while True:
+        active = np.flatnonzero(low < high)
+        if len(active) == 0:
+            return low
+        mid = (low[active] + high[active]) // 2
+        starts = offsets[mid]
+        lengths = offsets[mid + 1] - starts
+        dominated = np.zeros(len(active), dtype=bool)
+        # 按比较次数分组, 限制临时数组大小
+        ends = np.cumsum(lengths)
+        group_start = 0
+        while group_start < len(active):
+            group_end = max(np.searchsorted(ends, ends[group_start] - lengths[group_start] + PAIR_BUDGET),
+                            group_start + 1)
+            group = slice(group_start, group_end)
+            owner = np.repeat(np.arange(group_start, group_end), lengths[group])
+            first = np.cumsum(lengths[group]) - lengths[group]
+            index = np.arange(len(owner)) - np.repeat(first, lengths[group]) + np.repeat(starts[group], lengths[group])
+            hit = np.all(placed[index] >= points[active[owner]], axis=1)
+            dominated[owner[hit]] = True
+            group_start = group_end
+        low[active[dominated]] = mid[dominated] + 1
+        high[active[~dominated]] = mid[~dominated]
+
+
+def pareto_fronts(front, order_by=None):
+    """
+    前沿层编号 -> 逐层的行号列表
+
+    Args:
+        front (numpy.ndarray): non_dominated_sort 的结果
+        order_by (numpy.ndarray, optional): 层内排序依据(从大到小), 如综合评分
+
+    Returns:
+        list: 每层一个行号数组
+    """
+    if order_by is None:
+        order = np.argsort(front, kind='stable')
+    else:
+        order = np.lexsort((-np.asarray(order_by, dtype=np.float64), front))
+    counts = np.bincount(front)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+def rank_formulations(formulations, application=None, objectives=OBJECTIVES):
+    """
+    对制剂集合做多目标排序
+
+    Args:
+        formulations (FormulationSet): 制剂集合
+        application (str, optional): 应用类型或权重方案名
+        objectives (sequence): 参与排序的目标名
+
+    Returns:
+        dict: objectives(实际使用的目标名), values(目标矩阵), scores(综合评分),
+            front(每行前沿层), fronts(逐层行号, 层内按综合评分从高到低)
+    """
+    names, values = objective_matrix(formulations, application, objectives)
+    scores = score_formulations(formulations, application=application)
+    front = non_dominated_sort(values)
+    return {
+        'objectives': names,
+        'values': values,
+        'scores': scores,
+        'front': front,
+        'fronts': pareto_fronts(front, order_by=scores)
+    }
+
+
+def write_ranking(formulations, ranking, file_path):
+    """按前沿层写出排序结果CSV(层号从1开始), 缺失值写为NA"""
+    names = ranking['objectives']
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['front', 'name', 'score'] + names)
+        for layer, rows in enumerate(ranking['fronts'], start=1):
+            for row in rows:
+                values = ranking['values'][row]
+                writer.writerow([layer, formulations['name'][row], f"{ranking['scores'][row]:.2f}"] +
+                                ['NA' if np.isnan(v) else f"{v:.4g}" for v in values])
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="按类别子评分与实测FPF/MMAD对制剂做Pareto分层排序")
+    parser.add_argument('-i', '--input', required=True, help="输入文件路径(Markdown或CSV)")
+    parser.add_argument('-o', '--output', default='pareto_ranking.csv', help="输出CSV路径")
+    parser.add_argument('-p', '--profile', help="权重方案或应用类型(见profiles/目录), 默认hand_tuned")
+    parser.add_argument('--objectives', default=','.join(OBJECTIVES),
+                        help=f"逗号分隔的目标, 默认 {','.join(OBJECTIVES)}")
+    parser.add_argument('--show', type=int, default=3, help="打印前几层前沿")
+    args = parser.parse_args()
+    args.objectives = [name.strip() for name in args.objectives.split(',') if name.strip()]
+    unknown = [name for name in args.objectives if name not in OBJECTIVES]
+    if unknown:
+        parser.error(f"未知目标 {', '.join(unknown)}; 可选: {', '.join(OBJECTIVES)}")
+    return args
+
+
+def main():
+    """主函数"""
+    from validate_weights import load_data, normalize_carrier_types
+
+    args = parse_arguments()
+    if not os.path.exists(args.input):
+        print(f"错误: 找不到数据文件 '{args.input}'")
+        exit(1)
+
+    formulations = load_data(args.input)
+    normalize_carrier_types(formulations)
+    ranking = rank_formulations(formulations, application=args.profile, objectives=args.objectives)
+
+    print(f"排序目标: {', '.join(ranking['objectives'])}")
+    print(f"{len(formulations)} 条制剂分为 {len(ranking['fronts'])} 层前沿")
+    for layer, rows in enumerate(ranking['fronts'][:args.show], start=1):
+        members = ', '.join(f"{formulations['name'][row]}({ranking['scores'][row]:.2f})" for row in rows)
+        print(f"第{layer}层 ({len(rows)}): {members}")
+
+    write_ranking(formulations, ranking, args.output)
+    print(f"排序结果已保存至 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,60 @@
-from Bio import Entrez
-import pandas as pd
+# Bio.Entrez 与 pandas 在检索/保存时才加载, 导入本模块不承担其导入开销
+# 未指定 output_dir 时才使用 utils.path_manager 管理输出目录, 离线回放/基准测试无需该模块
+import io
+import json
 import time
 import os
 from datetime import datetime
 import logging
-from utils.path_manager import PathManager
+from entrez_transport import EntrezTransport
+from fetch_metrics import FetchMetrics
 
 class PubMedSearcher:
     """PubMed文献检索类"""
     
-    def __init__(self, email, api_key=None):
+    def __init__(self, email, api_key=None, transport=None, request_interval=0.5, retry_delay=2,
+                 output_dir=None):
         """
         初始化PubMed检索器
         
         Args:
             email (str): email address
             api_key (str, optional): use one's own api key
+            transport (optional): 请求传输层, 默认 EntrezTransport 直接访问NCBI;
+                可替换为 entrez_transport.RecordingTransport / ReplayTransport 录制或离线回放
+            request_interval (float): 每次获取文献前的等待时间(秒), 避免API限制
+            retry_delay (float): 重试前的等待时间(秒)
+            output_dir (str, optional): 输出目录(日志写入其下的logs目录); 默认由 utils.path_manager.PathManager 提供
         """
-        self.path_manager = PathManager()  # 先初始化路径管理器
-        self.path_manager.ensure_dirs()
+        self.transport = transport or EntrezTransport()
+        self.request_interval = request_interval
+        self.retry_delay = retry_delay
+        self.metrics = FetchMetrics()  # batch_fetch_articles 为每个主题重新创建
+        if output_dir is None:
+            from utils.path_manager import PathManager
+            self.path_manager = PathManager()  # 先初始化路径管理器
+            self.path_manager.ensure_dirs()
+            self.output_dir = self.path_manager.get_path('output')
+            self.log_dir = self.path_manager.get_path('logs')
+        else:
+            self.path_manager = None
+            self.output_dir = output_dir
+            self.log_dir = os.path.join(output_dir, 'logs')
+            os.makedirs(self.log_dir, exist_ok=True)
         self.setup_logging()  # 设置日志
         self.setup_entrez(email, api_key)  # 设置Entrez
         
     def setup_entrez(self, email, api_key):
         """配置Entrez"""
+        from Bio import Entrez
+        self.entrez = Entrez
         Entrez.email = email
         if api_key:
             Entrez.api_key = api_key
             
     def setup_logging(self):
         """配置日志"""
-        log_dir = self.path_manager.get_path('logs')
+        log_dir = self.log_dir
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file = os.path.join(log_dir, f"pubmed_search_{timestamp}.log")
         
@@ -54,13 +78,16 @@ class PubMedSearcher:
         """
         try:
             logging.info(f"开始检索: {term}")
-            handle = Entrez.esearch(
-                db="pubmed",
-                term=term,
-                retmax=retmax,
-                sort=sort
-            )
-            record = Entrez.read(handle)
+            with self.metrics.timed('search'):
+                body = self.transport.esearch(
+                    db="pubmed",
+                    term=term,
+                    retmax=retmax,
+                    sort=sort
+                )
+            self.metrics.add_bytes('search', body)
+            with self.metrics.timed('parse'):
+                record = self.entrez.read(io.BytesIO(body))
             pmids = record["IdList"]
             logging.info(f"检索到 {len(pmids)} 篇文献")
             return pmids
@@ -82,113 +109,253 @@ class PubMedSearcher:
         """
         for attempt in range(max_retries):
             try:
-                time.sleep(0.5)  # 避免API限制
-                handle = Entrez.efetch(
-                    db="pubmed", 
-                    id=pmid, 
-                    retmode="xml",
-                    timeout=timeout
-                )
-                article_data = Entrez.read(handle)
-                article = article_data["PubmedArticle"][0]["MedlineCitation"]["Article"]
-                
-                # 提取摘要
-                abstract = article.get("Abstract", {}).get("AbstractText", ["No abstract"])[0]
-                
-                # 提取MeSH词
-                mesh_terms = article_data["PubmedArticle"][0]["MedlineCitation"].get("MeshHeadingList", [])
-                keywords = ", ".join([mesh.get("DescriptorName", "") for mesh in mesh_terms])
-                
-                # 提取年份
-                pub_date = article["Journal"]["JournalIssue"]["PubDate"]
-                year = pub_date.get("Year", "Unknown")
-                
-                return {
-                    "PMID": pmid,
-                    "Title": article["ArticleTitle"],
-                    "Abstract": abstract,
-                    "Keywords": keywords,
-                    "Year": year,
-                    "Journal": article["Journal"]["Title"]
-                }
+                time.sleep(self.request_interval)  # 避免API限制
+                with self.metrics.timed('fetch'):
+                    body = self.transport.efetch(
+                        db="pubmed", 
+                        id=pmid, 
+                        retmode="xml",
+                        timeout=timeout
+                    )
+                self.metrics.add_bytes('fetch', body)
+                with self.metrics.timed('parse'):
+                    article_data = self.entrez.read(io.BytesIO(body))
+                    return self.parse_article(article_data["PubmedArticle"][0], pmid)
                 
             except Exception as e:
                 if attempt < max_retries - 1:
                     print(f"\n获取PMID:{pmid}失败，正在重试({attempt+2}/{max_retries})...")
-                    time.sleep(2)  # 重试前等待时间
+                    self.metrics.add_retry('fetch', e)
+                    time.sleep(self.retry_delay)  # 重试前等待时间
                     continue
                 else:
                     logging.error(f"获取文献 {pmid} 详情时出错: {str(e)}")
+                    self.metrics.add_failed_record()
                     return None
             
-    def batch_fetch_articles(self, search_terms):
-        """批量检索并保存文献信息"""
-        output_dir = self.path_manager.get_path('output')
-        print(f"文献将保存在: {output_dir}")
+    @staticmethod
+    def parse_article(pubmed_article, pmid):
+        """
+        从Entrez.read解析出的单条PubmedArticle中提取文献信息
         
-        # 计算总主题数
-        total_topics = len(search_terms)
-        current_topic = 0
+        Args:
+            pubmed_article (dict): Entrez.read结果中的一条PubmedArticle
+            pmid (str): PubMed ID
+            
+        Returns:
+            dict: 文献信息字典
+        """
+        article = pubmed_article["MedlineCitation"]["Article"]
         
-        for category, term in search_terms.items():
-            current_topic += 1
-            print(f"\n[主题 {current_topic}/{total_topics}] 处理类别: {category}")
+        # 提取摘要
+        abstract = article.get("Abstract", {}).get("AbstractText", ["No abstract"])[0]
+        
+        # 提取MeSH词
+        mesh_terms = pubmed_article["MedlineCitation"].get("MeshHeadingList", [])
+        keywords = ", ".join([mesh.get("DescriptorName", "") for mesh in mesh_terms])
+        
+        # 提取年份
+        pub_date = article["Journal"]["JournalIssue"]["PubDate"]
+        year = pub_date.get("Year", "Unknown")
+        
+        return {
+            "PMID": pmid,
+            "Title": article["ArticleTitle"],
+            "Abstract": abstract,
+            "Keywords": keywords,
+            "Year": year,
+            "Journal": article["Journal"]["Title"]
+        }
+            
+    def resolve_topics(self, search_terms):
+        """
+        先执行所有主题的检索, 返回各主题的PMID列表
+        
+        Args:
+            search_terms (dict): 类别 -> 检索词
+            
+        Returns:
+            tuple: (类别 -> PMIDs列表, 类别 -> 该主题的FetchMetrics(已记录检索阶段))
+        """
+        membership = {}
+        topic_metrics = {}
+        seen = set()
+        
+        for current_topic, (category, term) in enumerate(search_terms.items(), 1):
+            print(f"\n[主题 {current_topic}/{len(search_terms)}] 检索类别: {category}")
             print(f"检索词: {term}")
+            self.metrics = FetchMetrics(category, wall_clock=False)
             
-            # 检索文献
             pmids = self.search_pubmed(term)
-            print(f"找到 {len(pmids)} 篇文献")
+            new_pmids = [pmid for pmid in pmids if pmid not in seen]
+            seen.update(new_pmids)
+            membership[category] = pmids
+            print(f"找到 {len(pmids)} 篇文献, 其中 {len(new_pmids)} 篇未在之前的主题中出现")
             
-            if not pmids:
-                print("未找到相关文献，跳过")
+            self.metrics.expected = len(pmids)
+            topic_metrics[category] = self.metrics
+        
+        return membership, topic_metrics
+    
+    def fetch_unique_articles(self, pmids, progress_callback=None, name=None, attribute=None):
+        """
+        逐篇获取文献详细信息, 每个PMID只获取一次
+        
+        获取/解析阶段的指标记录在新建的 self.metrics 中, 并按 attribute 同时计入其他指标(如所属主题)。
+        
+        Args:
+            pmids (list): PMIDs列表(已去重)
+            progress_callback (callable, optional): 每处理一篇文献后调用, 参数为进度字典; 提供时替代终端进度输出
+            name (str, optional): 指标汇总中的名称
+            attribute (dict, optional): PMID -> 需同时计入该文献指标的FetchMetrics列表
+            
+        Returns:
+            dict: PMID -> 文献信息字典(获取失败的PMID不包含在内)
+        """
+        # 计算预估时间
+        estimated_time = len(pmids) * self.request_interval / 60  # 转换为分钟
+        print(f"正在获取文献详细信息... (预计需要 {estimated_time:.1f} 分钟)")
+        
+        merged = FetchMetrics(name, progress_callback)
+        merged.expected = len(pmids)
+        attribute = attribute or {}
+        articles = {}
+        start_time = time.time()
+        
+        for i, pmid in enumerate(pmids, 1):
+            # 单篇文献的指标先单独记录, 再累加到总指标及所属主题的指标
+            self.metrics = FetchMetrics()
+            article_info = self.fetch_article_details(pmid)
+            if article_info:
+                articles[pmid] = article_info
+                self.metrics.add_record()
+            record, self.metrics = self.metrics, merged
+            for metrics in [merged] + attribute.get(pmid, []):
+                metrics.merge(record)
+            
+            self.metrics.progress(pmid, done=i)
+            if progress_callback is not None:
                 continue
             
-            # 计算预估时间
-            estimated_time = len(pmids) * 0.5 / 60  # 转换为分钟
-            print(f"正在获取文献详细信息... (预计需要 {estimated_time:.1f} 分钟)")
-            
-            # 获取详细信息
-            articles = []
-            start_time = time.time()
-            
-            for i, pmid in enumerate(pmids, 1):
-                # 计算进度和剩余时间
-                elapsed_time = time.time() - start_time
-                progress = i / len(pmids)
-                if i > 1:  # 至少处理一篇后才计算剩余时间
-                    remaining_time = (elapsed_time / (i-1)) * (len(pmids) - i+1) / 60
-                    print(f"进度: {progress*100:.1f}% | "
-                          f"处理第 {i}/{len(pmids)} 篇文献 (PMID: {pmid}) | "
-                          f"预计还需 {remaining_time:.1f} 分钟", end='\r')
-                else:
-                    print(f"进度: {progress*100:.1f}% | "
-                          f"处理第 {i}/{len(pmids)} 篇文献 (PMID: {pmid})", end='\r')
-                
-                article_info = self.fetch_article_details(pmid)
-                if article_info:
-                    articles.append(article_info)
-            
-            # 保存为DataFrame
-            if articles:
-                df = pd.DataFrame(articles)
-                output_file = os.path.join(output_dir, f"{category}_literature.csv")
-                df.to_csv(output_file, index=False, encoding='utf-8')
-                print(f"\n已保存 {len(articles)} 篇文献到: {output_file}")
-                
-                # 显示成功率
-                success_rate = len(articles) / len(pmids) * 100
-                print(f"文献获取成功率: {success_rate:.1f}%")
+            # 计算进度和剩余时间
+            elapsed_time = time.time() - start_time
+            progress = i / len(pmids)
+            if i < len(pmids):
+                remaining_time = (elapsed_time / i) * (len(pmids) - i) / 60
+                print(f"进度: {progress*100:.1f}% | "
+                      f"处理第 {i}/{len(pmids)} 篇文献 (PMID: {pmid}) | "
+                      f"预计还需 {remaining_time:.1f} 分钟", end='\r')
             else:
-                print("\n未能获取任何文献的详细信息")
+                print(f"进度: {progress*100:.1f}% | "
+                      f"处理第 {i}/{len(pmids)} 篇文献 (PMID: {pmid})", end='\r')
+        
+        return articles
+    
+    def batch_fetch_articles(self, search_terms, progress_callback=None, merged_name="merged",
+                             topic_files=True):
+        """
+        批量检索并保存文献信息
+        
+        先完成所有主题的检索, 对全部PMID去重后每篇只获取一次, 再输出:
+        - {merged_name}_literature.csv: 合并语料(列与 combined_query_literature.csv 一致, 另加 Topics 列)
+        - {merged_name}_topics.json: 类别 -> PMIDs 的主题归属
+        - {merged_name}_metrics.json: 获取/解析/写入阶段的流程指标
+        - {category}_metrics.json: 各主题的流程指标(检索, 及该主题文献的获取/解析/写入; 共有文献计入每个所属主题)
+        - {category}_literature.csv: 各主题文献(topic_files=True时, 从共享记录中取出, 不重复获取)
+        
+        Args:
+            search_terms (dict): 类别 -> 检索词
+            progress_callback (callable, optional): 每处理一篇文献后调用, 参数为进度字典
+                (topic, pmid, done, total, records, elapsed_s, records_per_s, eta_s);
+                提供时替代终端进度输出
+            merged_name (str): 合并输出文件名前缀, 不能与类别同名(否则会覆盖合并语料的输出, 抛出ValueError)
+            topic_files (bool): 是否同时输出各主题的文献CSV
             
+        Returns:
+            dict: 类别(及merged_name) -> 指标汇总
+        """
+        if merged_name in search_terms:
+            raise ValueError(f"Search term category {merged_name!r} clashes with merged_name; "
+                             f"rename the category or pass a different merged_name")
+        output_dir = self.output_dir
+        print(f"文献将保存在: {output_dir}")
+        
+        # 检索所有主题
+        membership, topic_metrics = self.resolve_topics(search_terms)
+        summaries = {}
+        
+        # 合并去重, 保持首次出现的顺序
+        unique_pmids = list(dict.fromkeys(pmid for pmids in membership.values() for pmid in pmids))
+        total_hits = sum(len(pmids) for pmids in membership.values())
+        print(f"\n所有主题共 {total_hits} 条检索结果, 去重后 {len(unique_pmids)} 篇文献")
+        
+        metrics_file = os.path.join(output_dir, f"{merged_name}_metrics.json")
+        if not unique_pmids:
+            print("未找到相关文献")
+            self.metrics = FetchMetrics(merged_name, progress_callback)
+            self.write_topic_metrics(topic_metrics, summaries)
+            self.metrics.write_json(metrics_file)
+            summaries[merged_name] = self.metrics.summary()
+            return summaries
+        
+        # 主题归属
+        topics = {pmid: [] for pmid in unique_pmids}
+        for category, pmids in membership.items():
+            for pmid in dict.fromkeys(pmids):
+                topics[pmid].append(category)
+        attribute = {pmid: [topic_metrics[category] for category in categories]
+                     for pmid, categories in topics.items()}
+        
+        # 获取详细信息(每个PMID一次), 指标同时计入所属主题
+        articles = self.fetch_unique_articles(unique_pmids, progress_callback, merged_name, attribute)
+        with open(os.path.join(output_dir, f"{merged_name}_topics.json"), 'w', encoding='utf-8') as f:
+            json.dump(membership, f, indent=2, ensure_ascii=False)
+        
+        if articles:
+            import pandas as pd
+            with self.metrics.timed('write'):
+                merged = pd.DataFrame([articles[pmid] for pmid in unique_pmids if pmid in articles])
+                merged['Topics'] = [';'.join(topics[pmid]) for pmid in merged['PMID']]
+                output_file = os.path.join(output_dir, f"{merged_name}_literature.csv")
+                merged.to_csv(output_file, index=False, encoding='utf-8')
+            print(f"\n已保存 {len(merged)} 篇文献到: {output_file}")
+            
+            # 显示成功率
+            success_rate = len(articles) / len(unique_pmids) * 100
+            print(f"文献获取成功率: {success_rate:.1f}%")
+            
+            if topic_files:
+                for category, pmids in membership.items():
+                    rows = [articles[pmid] for pmid in dict.fromkeys(pmids) if pmid in articles]
+                    if not rows:
+                        continue
+                    topic_file = os.path.join(output_dir, f"{category}_literature.csv")
+                    with self.metrics.timed('write'), topic_metrics[category].timed('write'):
+                        pd.DataFrame(rows).to_csv(topic_file, index=False, encoding='utf-8')
+                    print(f"[{category}] 已保存 {len(rows)} 篇文献到: {topic_file}")
+        else:
+            print("\n未能获取任何文献的详细信息")
+        
+        self.write_topic_metrics(topic_metrics, summaries)
+        self.metrics.write_json(metrics_file)
+        print(f"流程指标已保存到: {metrics_file}")
+        
         print("\n所有主题处理完成！")
         print(f"结果保存在: {output_dir}")
+        summaries[merged_name] = self.metrics.summary()
+        return summaries
+
+    def write_topic_metrics(self, topic_metrics, summaries):
+        """写出各主题的 {category}_metrics.json, 并将汇总加入summaries"""
+        for category, metrics in topic_metrics.items():
+            metrics.write_json(os.path.join(self.output_dir, f"{category}_metrics.json"))
+            summaries[category] = metrics.summary()
 
 def main():
     try:
         print("开始运行PubMed文献检索...")
         
-        # 配置搜索词 可进行修改或添加
+        # 配置搜索词 可进行修改或添加; 多个主题的重复PMID只获取一次, 合并语料输出为 merged_literature.csv
         search_terms = {
             "combined_query": (
                 "(traditional Chinese medicine OR TCM OR TCM-components OR TCM-formula OR natural factors) AND "
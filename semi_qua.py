@@ -1,37 +1,20 @@
 # 基本框架 半定量评分系统
+# 权重方案由 weight_profiles.py 从 profiles/ 目录加载并缓存, 本模块不依赖第三方库(批量评分时才加载numpy)
+from weight_profiles import PARAMETERS, get_weights
+
 def calculate_absolute_weights(application=None):
-    """计算基于文献分析(代码以及人工结合)的绝对权重值"""
-    weights = {
-        # 物理特性 (35%)
-        'particle_size': 0.200,
-        'pdi': 0.075,
-        'zeta_potential': 0.075,
-        
-        # 载体特性 (26%)
-        'carrier_type': 0.130,
-        'surface_modification': 0.130,
-        
-        # 生物特性 (25%)
-        'toxicity': 0.125,
-        'stability': 0.125,
-        
-        # 递送特性 (10%)
-        'cellular_uptake': 0.050,
-        'biodistribution': 0.050,
-        
-        # 药物特性 (4%)
-        'encapsulation_efficiency': 0.040
-    }
+    """
+    返回基于文献分析(代码以及人工结合)的绝对权重值
     
-    # 验证权重总和
-    total_weight = sum(weights.values())
-    if not 0.99 <= total_weight <= 1.01:  # 允许0.01的误差
-        raise ValueError(f"Weight sum should be 1.0, got {total_weight}")
+    参数:
+    application (str, optional): 应用类型(如'pulmonary')或方案名(如'hand_tuned', 'literature'),
+        None时使用默认方案 hand_tuned; 方案见 profiles/ 目录
     
-    if application:
-        # 根据应用调整权重
-        pass
-    return weights
+    返回:
+    dict: 参数名 -> 权重(总和为1)
+    """
+    # 方案在加载时已验证权重总和, 这里返回副本以免调用方修改缓存
+    return dict(get_weights(application))
 
 def validate_parameters(particle_size, pdi, zeta_potential):
     """验证输入参数的有效性"""
@@ -49,6 +32,129 @@ def validate_parameters(particle_size, pdi, zeta_potential):
     if zeta_potential is not None and (zeta_potential < -100 or zeta_potential > 100):
         raise ValueError("Zeta potential should be between -100 and 100 mV")
 
+# 粒径评分函数
+def size_score(size):
+    if size is None: return 3
+    if size < 50: return 5
+    elif 50 <= size < 100: return 4
+    elif 100 <= size < 200: return 3
+    elif 200 <= size < 300: return 0
+    else: return 0
+
+# PDI评分函数
+def pdi_score(value):
+    if value is None: return 3
+    if value > 1:
+        normalized_value = value / 100 if value > 10 else value / 10
+        value = min(normalized_value, 1)
+
+    if value < 0.1: return 5
+    elif value < 0.2: return 4
+    elif value < 0.3: return 3
+    elif value < 0.4: return 2
+    elif value < 1.0: return 1
+    else: return 0
+
+# Zeta电位评分函数
+def zeta_score(value):
+    if value is None: return 0
+
+    abs_zeta = abs(value)
+    if abs_zeta > 30: return 5
+    elif abs_zeta > 20: return 4
+    elif abs_zeta > 10: return 2
+    else: return 0
+
+# 载体类型评分函数
+CARRIER_SCORES = {
+    'NLC': 5,      # 纳米结构脂质载体
+    'SLN': 4,      # 固体脂质纳米粒
+    'PLGA': 4,     # PLGA聚合物纳米粒
+    'Liposome': 3, # 脂质体
+    'Chitosan': 4, # 壳聚糖纳米粒
+    'Inorganic': 2 # 无机纳米粒
+}
+
+def carrier_score(type_str):
+    if type_str is None: 
+        return 3
+    return CARRIER_SCORES.get(type_str, 3)  # 未知类型返回默认值3
+
+# 表面修饰评分函数
+SURFACE_SCORES = {
+    'PEG': 5,        # PEG修饰
+    'Chitosan': 4,   # 壳聚糖修饰
+    'Cationic': 3,   # 阳离子修饰
+    'Antibody': 3,   # 抗体修饰
+    'None': 1,       # 无修饰
+    'Poloxamer 188': 4  # 新的表面修饰类型 特定修饰
+}
+
+def surface_score(mod_str):
+    if mod_str is None:
+        return 3
+    return SURFACE_SCORES.get(mod_str, 3)  # 未知类型返回默认值3
+
+# 毒性评分函数
+def toxicity_score(viability=None):
+    if viability is None: return 3
+    if viability >= 90: return 5
+    elif viability >= 80: return 4
+    elif viability >= 70: return 3
+    elif viability >= 60: return 2
+    else: return 1
+
+# 稳定性评分函数
+def stability_score(stab=None):
+    if stab is None: return 3
+    if stab >= 90: return 5
+    elif stab >= 80: return 4
+    elif stab >= 70: return 3
+    else: return 2
+
+# 细胞摄取评分函数
+def uptake_score(rate=None):
+    if rate is None: return 3
+    if rate >= 80: return 5
+    elif rate >= 60: return 4
+    elif rate >= 40: return 3
+    elif rate >= 20: return 2
+    else: return 1
+
+# 生物分布评分函数
+def distribution_score(lung_dist=None):
+    if lung_dist is None: return 3
+    if lung_dist >= 60: return 5
+    elif lung_dist >= 40: return 4
+    elif lung_dist >= 20: return 3
+    elif lung_dist >= 10: return 2
+    else: return 1
+
+# 包封率评分函数
+def ee_score(ee=None):
+    if ee is None: return 3
+    if ee >= 90: return 5
+    elif ee >= 80: return 4
+    elif ee >= 70: return 3
+    elif ee >= 60: return 2
+    else: return 1
+
+# FPF评分函数
+def fpf_score(value=None):
+    if value is None: return 3
+    if value >= 70: return 5
+    elif value >= 60: return 4
+    elif value >= 50: return 3
+    elif value >= 40: return 2
+    else: return 1
+
+# MMAD评分函数
+def mmad_score(value=None):
+    if value is None: return 3
+    if 1 <= value <= 5: return 5
+    elif value < 1: return 2
+    else: return 1
+
 def calculate_score(particle_size, pdi, zeta_potential, carrier_type, surface_modification, 
                    toxicity=None, stability=None, cellular_uptake=None, biodistribution=None,
                    encapsulation_efficiency=None, fpf=None, mmad=None, application=None):
@@ -68,7 +174,7 @@ def calculate_score(particle_size, pdi, zeta_potential, carrier_type, surface_mo
     encapsulation_efficiency (float, optional): 包封率百分比
     fpf (float, optional): 粒径分布函数(FPF)
     mmad (float, optional): 中位粒径(MMAD)
-    application (str, optional): 应用类型
+    application (str, optional): 应用类型或权重方案名, 见 calculate_absolute_weights
     
     返回:
     float: 综合评分(0-5分)
@@ -76,129 +182,8 @@ def calculate_score(particle_size, pdi, zeta_potential, carrier_type, surface_mo
     # 验证参数
     validate_parameters(particle_size, pdi, zeta_potential)
     
-    # 粒径评分函数
-    def size_score(size):
-        if size is None: return 3
-        if size < 50: return 5
-        elif 50 <= size < 100: return 4
-        elif 100 <= size < 200: return 3
-        elif 200 <= size < 300: return 0
-        else: return 0
-    
-    # PDI评分函数
-    def pdi_score(value):
-        if value is None: return 3
-        if value > 1:
-            normalized_value = value / 100 if value > 10 else value / 10
-            value = min(normalized_value, 1)
-        
-        if value < 0.1: return 5
-        elif value < 0.2: return 4
-        elif value < 0.3: return 3
-        elif value < 0.4: return 2
-        elif value < 1.0: return 1
-        else: return 0
-    
-    # Zeta电位评分函数
-    def zeta_score(value):
-        if value is None: return 0
-        
-        abs_zeta = abs(value)
-        if abs_zeta > 30: return 5
-        elif abs_zeta > 20: return 4
-        elif abs_zeta > 10: return 2
-        else: return 0
-    
-    # 载体类型评分函数
-    def carrier_score(type_str):
-        if type_str is None: 
-            return 3
-        scores = {
-            'NLC': 5,      # 纳米结构脂质载体
-            'SLN': 4,      # 固体脂质纳米粒
-            'PLGA': 4,     # PLGA聚合物纳米粒
-            'Liposome': 3, # 脂质体
-            'Chitosan': 4, # 壳聚糖纳米粒
-            'Inorganic': 2 # 无机纳米粒
-        }
-        return scores.get(type_str, 3)  # 未知类型返回默认值3
-    
-    # 表面修饰评分函数
-    def surface_score(mod_str):
-        if mod_str is None:
-            return 3
-        scores = {
-            'PEG': 5,        # PEG修饰
-            'Chitosan': 4,   # 壳聚糖修饰
-            'Cationic': 3,   # 阳离子修饰
-            'Antibody': 3,   # 抗体修饰
-            'None': 1,       # 无修饰
-            'Poloxamer 188': 4  # 新的表面修饰类型 特定修饰
-        }
-        return scores.get(mod_str, 3)  # 未知类型返回默认值3
-    
-    # 毒性评分函数
-    def toxicity_score(viability=None):
-        if viability is None: return 3
-        if viability >= 90: return 5
-        elif viability >= 80: return 4
-        elif viability >= 70: return 3
-        elif viability >= 60: return 2
-        else: return 1
-    
-    # 稳定性评分函数
-    def stability_score(stab=None):
-        if stab is None: return 3
-        if stab >= 90: return 5
-        elif stab >= 80: return 4
-        elif stab >= 70: return 3
-        else: return 2
-    
-    # 细胞摄取评分函数
-    def uptake_score(rate=None):
-        if rate is None: return 3
-        if rate >= 80: return 5
-        elif rate >= 60: return 4
-        elif rate >= 40: return 3
-        elif rate >= 20: return 2
-        else: return 1
-    
-    # 生物分布评分函数
-    def distribution_score(lung_dist=None):
-        if lung_dist is None: return 3
-        if lung_dist >= 60: return 5
-        elif lung_dist >= 40: return 4
-        elif lung_dist >= 20: return 3
-        elif lung_dist >= 10: return 2
-        else: return 1
-    
-    # 包封率评分函数
-    def ee_score(ee=None):
-        if ee is None: return 3
-        if ee >= 90: return 5
-        elif ee >= 80: return 4
-        elif ee >= 70: return 3
-        elif ee >= 60: return 2
-        else: return 1
-
-    # FPF评分函数
-    def fpf_score(value=None):
-        if value is None: return 3
-        if value >= 70: return 5
-        elif value >= 60: return 4
-        elif value >= 50: return 3
-        elif value >= 40: return 2
-        else: return 1
-
-    # MMAD评分函数
-    def mmad_score(value=None):
-        if value is None: return 3
-        if 1 <= value <= 5: return 5
-        elif value < 1: return 2
-        else: return 1
-    
-    # 使用新的权重分配
-    weights = calculate_absolute_weights(application)
+    # 使用预先加载并验证过的权重方案
+    weights = get_weights(application)
     
     # 计算基础评分
     scores = {
@@ -230,6 +215,177 @@ def calculate_score(particle_size, pdi, zeta_potential, carrier_type, surface_mo
     
     return round(normalized_score, 2)
 
+def score_formulation(formulation, application=None):
+    """
+    计算单条制剂记录(formulation.Formulation)的综合评分
+
+    参数:
+    formulation (Formulation): 制剂记录
+    application (str, optional): 应用类型
+
+    返回:
+    float: 综合评分(0-5分)
+    """
+    return calculate_score(
+        formulation.particle_size, formulation.pdi, formulation.zeta_potential,
+        formulation.carrier_type, formulation.surface_modification,
+        toxicity=formulation.toxicity,
+        stability=formulation.stability,
+        cellular_uptake=formulation.cellular_uptake,
+        biodistribution=formulation.biodistribution,
+        encapsulation_efficiency=formulation.encapsulation_efficiency,
+        fpf=formulation.fpf,
+        mmad=formulation.mmad,
+        application=application
+    )
+
+# 参与加权的参数顺序 与 calculate_score 中的累加顺序一致
+SCORED_PARAMETERS = PARAMETERS
+
+def validate_parameter_columns(formulations):
+    """批量验证制剂集合中的粒径与Zeta电位范围"""
+    import numpy as np
+
+    sizes = formulations['particle_size']
+    if np.any((sizes < 0) | (sizes > 1000)):
+        raise ValueError("Particle size should be between 0 and 1000 nm")
+    zetas = formulations['zeta_potential']
+    if np.any((zetas < -100) | (zetas > 100)):
+        raise ValueError("Zeta potential should be between -100 and 100 mV")
+
+def parameter_scores(formulations):
+    """
+    批量计算制剂集合(formulation.FormulationSet)各参数的未加权评分
+
+    与逐条调用 size_score()/pdi_score() 等函数结果一致, 但直接在列数组上运算。
+
+    参数:
+    formulations (FormulationSet): 制剂集合
+
+    返回:
+    dict: 参数名 -> float数组(0-5分), 可选参数缺失处为NaN
+    """
+    import numpy as np
+
+    validate_parameter_columns(formulations)
+
+    size = formulations['particle_size']
+    pdi = formulations['pdi']
+    zeta = np.abs(formulations['zeta_potential'])
+
+    # PDI大于1时按百分比/十分比归一化
+    pdi = np.where(pdi > 1, np.minimum(np.where(pdi > 10, pdi / 100, pdi / 10), 1), pdi)
+
+    def lookup(column, score_func):
+        table = {value: score_func(value) for value in set(column)}
+        return np.fromiter((table[value] for value in column), dtype=np.float64, count=len(column))
+
+    def optional(values, conditions, choices, default):
+        scores = np.select(conditions, choices, default).astype(np.float64)
+        scores[np.isnan(values)] = np.nan
+        return scores
+
+    tox = formulations['toxicity']
+    stab = formulations['stability']
+    uptake = formulations['cellular_uptake']
+    dist = formulations['biodistribution']
+    ee = formulations['encapsulation_efficiency']
+
+    return {
+        'particle_size': np.select(
+            [np.isnan(size), size < 50, size < 100, size < 200], [3, 5, 4, 3], 0).astype(np.float64),
+        'pdi': np.select(
+            [np.isnan(pdi), pdi < 0.1, pdi < 0.2, pdi < 0.3, pdi < 0.4, pdi < 1.0],
+            [3, 5, 4, 3, 2, 1], 0).astype(np.float64),
+        'zeta_potential': np.select(
+            [np.isnan(zeta), zeta > 30, zeta > 20, zeta > 10], [0, 5, 4, 2], 0).astype(np.float64),
+        'carrier_type': lookup(formulations['carrier_type'], carrier_score),
+        'surface_modification': lookup(formulations['surface_modification'], surface_score),
+        'toxicity': optional(tox, [tox >= 90, tox >= 80, tox >= 70, tox >= 60], [5, 4, 3, 2], 1),
+        'stability': optional(stab, [stab >= 90, stab >= 80, stab >= 70], [5, 4, 3], 2),
+        'cellular_uptake': optional(
+            uptake, [uptake >= 80, uptake >= 60, uptake >= 40, uptake >= 20], [5, 4, 3, 2], 1),
+        'biodistribution': optional(dist, [dist >= 60, dist >= 40, dist >= 20, dist >= 10], [5, 4, 3, 2], 1),
+        'encapsulation_efficiency': optional(ee, [ee >= 90, ee >= 80, ee >= 70, ee >= 60], [5, 4, 3, 2], 1)
+    }
+
+def score_formulations(formulations, application=None):
+    """
+    批量计算制剂集合(formulation.FormulationSet)的综合评分
+
+    参数:
+    formulations (FormulationSet): 制剂集合
+    application (str, optional): 应用类型
+
+    返回:
+    numpy.ndarray: 每条制剂的综合评分(0-5分)
+    """
+    import numpy as np
+
+    weights = get_weights(application)
+    scores = parameter_scores(formulations)
+
+    weighted_sum = np.zeros(len(formulations))
+    total_weight = np.zeros(len(formulations))
+    for param in SCORED_PARAMETERS:
+        present = ~np.isnan(scores[param])
+        weighted_sum += np.where(present, scores[param] * weights[param], 0.0)
+        total_weight += np.where(present, weights[param], 0.0)
+
+    normalized = np.clip(weighted_sum / total_weight, 0, 5)
+    rounded = np.round(normalized, 2)
+    # np.round与内置round在接近.5的边界上可能不同, 这些位置按round()重新计算以保持与calculate_score一致
+    scaled = normalized * 100
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[ties] = [round(float(value), 2) for value in normalized[ties]]
+    return rounded
+
+# 评分参数所属类别(与 keyword_analysis.py 的 parameter_categories 对应), 用于多目标排序
+CATEGORIES = {
+    'physical': ('particle_size', 'pdi', 'zeta_potential'),
+    'carrier': ('carrier_type', 'surface_modification'),
+    'biological': ('toxicity', 'stability'),
+    'delivery': ('cellular_uptake', 'biodistribution'),
+    'drug': ('encapsulation_efficiency',)
+}
+
+def category_scores(formulations, application=None):
+    """
+    批量计算制剂集合各类别的子评分
+
+    每个类别为该类别内已有参数评分的加权平均(权重同 score_formulations),
+    类别内参数权重均为0时取算术平均。
+
+    参数:
+    formulations (FormulationSet): 制剂集合
+    application (str, optional): 应用类型
+
+    返回:
+    dict: 类别名 -> float数组(0-5分), 类别内参数全部缺失处为NaN
+    """
+    import numpy as np
+
+    weights = get_weights(application)
+    scores = parameter_scores(formulations)
+
+    result = {}
+    for category, params in CATEGORIES.items():
+        weighted_sum = np.zeros(len(formulations))
+        total_weight = np.zeros(len(formulations))
+        plain_sum = np.zeros(len(formulations))
+        count = np.zeros(len(formulations))
+        for param in params:
+            present = ~np.isnan(scores[param])
+            values = np.where(present, scores[param], 0.0)
+            weighted_sum += values * weights[param]
+            total_weight += present * weights[param]
+            plain_sum += values
+            count += present
+        weighted = weighted_sum / np.where(total_weight > 0, total_weight, 1)
+        plain = np.where(count > 0, plain_sum / np.maximum(count, 1), np.nan)
+        result[category] = np.where(total_weight > 0, weighted, plain)
+    return result
+
 # 评分解释函数
 def interpret_score(score):
     """解释评分含义"""
@@ -0,0 +1,223 @@
+# 合成数据生成器 用于性能基准测试(benchmark.py)
+# 制剂数据与 nanocarriers.csv 列名一致, 文献数据与 combined_query_literature.csv 列名一致
+import csv
+import numpy as np
+from xml.sax.saxutils import escape
+from formulation import NANOCARRIER_COLUMNS
+
+# combined_query_literature.csv 的列顺序
+LITERATURE_COLUMNS = ['PMID', 'Title', 'Abstract', 'Keywords', 'Year', 'Journal']
+
+CARRIER_TYPES = ['liposome', 'NLC', 'SLN', 'PLGA', 'Polymer', 'Chitosan', 'Inorganic']
+SURFACE_MODIFICATIONS = [None, 'None', 'PEG', 'Chitosan', 'Cationic', 'Poloxamer 188', 'Gel']
+
+_HERBS = ['curcumin', 'baicalin', 'tanshinone IIA', 'berberine', 'quercetin', 'magnolol',
+          'ginsenoside Rg3', 'artemisinin', 'emodin', 'triptolide']
+_CARRIER_NAMES = ['liposomes', 'solid lipid nanoparticles', 'nanostructured lipid carriers',
+                  'PLGA nanoparticles', 'chitosan nanoparticles', 'polymeric micelles']
+_DISEASES = ['lung cancer', 'COPD', 'asthma', 'pulmonary fibrosis', 'tuberculosis', 'acute lung injury']
+_MESH = ['Nanoparticles', 'Liposomes', 'Drug Carriers', 'Administration, Inhalation', 'Lung',
+         'Medicine, Chinese Traditional', 'Particle Size', 'Drug Delivery Systems', 'Animals', 'Humans']
+_JOURNALS = ['International journal of pharmaceutics', 'Journal of controlled release',
+             'Drug delivery', 'Molecular pharmaceutics', 'Acta pharmaceutica Sinica. B']
+_SENTENCES = [
+    'The surface modification with PEG improved mucus penetration and storage stability.',
+    'Cellular uptake and internalization were evaluated in A549 cells.',
+    'Biodistribution studies showed enhanced lung deposition after inhalation.',
+    'No obvious cytotoxicity was observed, indicating good biocompatibility.',
+    'The formulation exhibited sustained release over 48 h.',
+    'The aerodynamic diameter was suitable for deep lung delivery.',
+    'Hyaluronic acid coating provided specific targeting to inflamed tissue.',
+]
+
+
+def _na_mask(rng, n, missing_rate):
+    return rng.random(n) < missing_rate
+
+
+def generate_formulations(n, seed=0, missing_rate=0.1):
+    """
+    生成与 nanocarriers.csv 同结构的合成制剂数据
+
+    Args:
+        n (int): 行数
+        seed (int): 随机种子
+        missing_rate (float): 可缺失列中NA的比例
+
+    Returns:
+        dict: 列名 -> 列表/数组, 缺失值为None(文本)或NaN(数值)
+    """
+    rng = np.random.default_rng(seed)
+
+    def numeric(low, high, decimals, nullable=True):
+        values = np.round(rng.uniform(low, high, n), decimals)
+        if nullable:
+            values[_na_mask(rng, n, missing_rate)] = np.nan
+        return values
+
+    carriers = rng.choice(CARRIER_TYPES, n)
+    surfaces = [SURFACE_MODIFICATIONS[i] for i in rng.integers(0, len(SURFACE_MODIFICATIONS), n)]
+    return {
+        'name': [f"syn-{carrier.lower()}-{i:07d}" for i, carrier in enumerate(carriers)],
+        'particle_size': numeric(10, 400, 2, nullable=False),
+        'ps_sd': numeric(0.1, 25, 2),
+        'pdi': numeric(0.03, 0.6, 3),
+        'pdi_sd': numeric(0.001, 0.1, 3),
+        'zeta': numeric(-45, 45, 2),
+        'zeta_sd': numeric(0.1, 3, 2),
+        'carrier_type': list(carriers),
+        'surface_modify': surfaces,
+        'FPF': numeric(20, 80, 2),
+        'fpf_sd': numeric(0.1, 10, 2),
+        'mmad': numeric(0.8, 7, 2),
+        'mmad_sd': numeric(0.01, 1.7, 2),
+        'refer': [f"{value:08X}" for value in rng.integers(0, 16 ** 8, n)],
+        'NOTE': [''] * n
+    }
+
+
+def _cell(value):
+    """将单元格值格式化为CSV/Markdown文本, 缺失值写为NA"""
+    if value is None or (isinstance(value, float) and value != value):
+        return 'NA'
+    return str(value)
+
+
+def _rows(columns):
+    return zip(*(columns[col] for col in NANOCARRIER_COLUMNS))
+
+
+def write_formulations_csv(columns, path):
+    """将合成制剂数据写为CSV(与 nanocarriers.csv 格式一致)"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(NANOCARRIER_COLUMNS)
+        for row in _rows(columns):
+            writer.writerow([_cell(value) for value in row])
+
+
+def write_formulations_markdown(columns, path):
+    """将合成制剂数据写为Markdown表格(validate_weights.load_from_markdown 可读取)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('| ' + ' | '.join(NANOCARRIER_COLUMNS) + ' |\n')
+        f.write('|' + '---|' * len(NANOCARRIER_COLUMNS) + '\n')
+        for row in _rows(columns):
+            f.write('| ' + ' | '.join(_cell(value) for value in row) + ' |\n')
+
+
+def generate_literature(n, seed=0):
+    """
+    生成与 combined_query_literature.csv 同结构的合成文献记录
+
+    摘要中包含 keyword_analysis.py 统计的关键参数以及粒径/PDI/Zeta电位等数值描述。
+
+    Args:
+        n (int): 行数
+        seed (int): 随机种子
+
+    Returns:
+        list: 文献信息字典列表
+    """
+    rng = np.random.default_rng(seed)
+    herbs = rng.integers(0, len(_HERBS), n)
+    carriers = rng.integers(0, len(_CARRIER_NAMES), n)
+    diseases = rng.integers(0, len(_DISEASES), n)
+    sizes = np.round(rng.uniform(20, 300, n), 1)
+    size_sds = np.round(rng.uniform(0.5, 20, n), 1)
+    pdis = np.round(rng.uniform(0.05, 0.5, n), 2)
+    zetas = np.round(rng.uniform(-40, 40, n), 1)
+    ees = np.round(rng.uniform(50, 99, n), 1)
+    extras = rng.integers(0, len(_SENTENCES), (n, 2))
+    mesh = rng.integers(0, len(_MESH), (n, 3))
+    years = rng.integers(2005, 2026, n)
+    journals = rng.integers(0, len(_JOURNALS), n)
+    pmids = 10000000 + rng.choice(30000000, n, replace=False)
+
+    rows = []
+    for i in range(n):
+        herb = _HERBS[herbs[i]]
+        carrier = _CARRIER_NAMES[carriers[i]]
+        disease = _DISEASES[diseases[i]]
+        abstract = (
+            f"{herb.capitalize()} is a traditional Chinese medicine component with poor solubility. "
+            f"Here, {herb}-loaded {carrier} were prepared for pulmonary delivery against {disease}. "
+            f"The particle size was {sizes[i]} ± {size_sds[i]} nm with a PDI of {pdis[i]} "
+            f"and a zeta potential of {zetas[i]} mV. "
+            f"The encapsulation efficiency reached {ees[i]}%. "
+            f"{_SENTENCES[extras[i, 0]]} {_SENTENCES[extras[i, 1]]}"
+        )
+        rows.append({
+            'PMID': str(pmids[i]),
+            'Title': f"Inhalable {herb}-loaded {carrier} for the treatment of {disease}.",
+            'Abstract': abstract,
+            'Keywords': ', '.join(dict.fromkeys(_MESH[j] for j in mesh[i])),
+            'Year': str(years[i]),
+            'Journal': _JOURNALS[journals[i]]
+        })
+    return rows
+
+
+def write_literature_csv(rows, path):
+    """将合成文献记录写为CSV(与 combined_query_literature.csv 格式一致)"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=LITERATURE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def literature_to_pubmed_xml(rows):
+    """
+    将文献记录转换为 efetch(retmode="xml") 返回格式的PubmedArticleSet
+
+    Args:
+        rows (list): generate_literature 生成的文献信息字典列表
+
+    Returns:
+        bytes: 可由 Bio.Entrez.read 解析的XML
+    """
+    parts = [
+        '<?xml version="1.0" ?>\n'
+        '<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" '
+        '"https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">\n'
+        '<PubmedArticleSet>\n'
+    ]
+    for row in rows:
+        mesh = ''.join(
+            f'<MeshHeading><DescriptorName MajorTopicYN="N">{escape(term)}</DescriptorName></MeshHeading>'
+            for term in row['Keywords'].split(', ') if term
+        )
+        parts.append(
+            '<PubmedArticle><MedlineCitation Status="MEDLINE" Owner="NLM">'
+            f'<PMID Version="1">{escape(row["PMID"])}</PMID>'
+            '<Article PubModel="Print"><Journal>'
+            '<JournalIssue CitedMedium="Internet">'
+            f'<PubDate><Year>{escape(row["Year"])}</Year></PubDate></JournalIssue>'
+            f'<Title>{escape(row["Journal"])}</Title></Journal>'
+            f'<ArticleTitle>{escape(row["Title"])}</ArticleTitle>'
+            f'<Abstract><AbstractText>{escape(row["Abstract"])}</AbstractText></Abstract>'
+            '</Article>'
+            f'<MeshHeadingList>{mesh}</MeshHeadingList>'
+            '</MedlineCitation></PubmedArticle>\n'
+        )
+    parts.append('</PubmedArticleSet>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def pmids_to_esearch_xml(pmids):
+    """
+    将PMID列表转换为 esearch 返回格式的eSearchResult
+
+    Args:
+        pmids (list): PMID字符串列表
+
+    Returns:
+        bytes: 可由 Bio.Entrez.read 解析的XML
+    """
+    ids = ''.join(f'<Id>{escape(str(pmid))}</Id>' for pmid in pmids)
+    return (
+        '<?xml version="1.0" encoding="UTF-8" ?>\n'
+        '<!DOCTYPE eSearchResult PUBLIC "-//NLM//DTD esearch 20060628//EN" '
+        '"https://eutils.ncbi.nlm.nih.gov/eutils/dtd/20060628/esearch.dtd">\n'
+        f'<eSearchResult><Count>{len(pmids)}</Count><RetMax>{len(pmids)}</RetMax><RetStart>0</RetStart>'
+        f'<IdList>{ids}</IdList></eSearchResult>\n'
+    ).encode('utf-8')
@@ -1,22 +1,27 @@
 # 用于验证半定量评分系统,利用原文数据验证相关性,涉及spearman相关性分析. 调用了semi_qua.py中的calculate_score函数
 # 输入文件可以是Markdown或CSV格式,列名像nanocarriers.csv
-import pandas as pd
-import numpy as np
+# pandas/scipy/matplotlib 在读取CSV、计算相关性、绘图时才加载, 只做评分时不承担其导入开销
 import sys
 import argparse
 import os
 import re
 import csv
-from scipy.stats import spearmanr
-import matplotlib.pyplot as plt
-from semi_qua import calculate_score
+from semi_qua import score_formulations
+from formulation import Formulation, FormulationSet
 
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description="验证半定量评分系统权重")
     parser.add_argument('-i', '--input', required=True, help="输入文件路径(Markdown或CSV)")
     parser.add_argument('-o', '--output', help="输出目录")
-    return parser.parse_args()
+    parser.add_argument('-p', '--profile', help="权重方案或应用类型(见profiles/目录), 默认hand_tuned")
+    parser.add_argument('-m', '--compare-models', action='store_true',
+                        help="用留一法和k折交叉验证比较线性/保序回归/kNN/核岭回归对FPF与MMAD的预测")
+    parser.add_argument('-k', '--folds', type=int, default=5, help="k折交叉验证的折数(至少2)")
+    args = parser.parse_args()
+    if args.folds < 2:
+        parser.error("--folds should be at least 2")
+    return args
 
 def load_from_markdown(file_path):
     """从Markdown文件加载数据"""
@@ -40,41 +45,43 @@ def load_from_markdown(file_path):
             else:
                 particle_size = None
             
-            # 创建制剂字典
-            form = {
-                'name': parts[1].strip(),
-                'particle_size': particle_size,
-                'pdi': float(parts[4].strip()) if parts[4].strip() and parts[4].strip().lower() != 'na' else None,
-                'zeta_potential': float(parts[6].strip()) if parts[6].strip() and parts[6].strip().lower() != 'na' else None,
-                'carrier_type': parts[8].strip() if parts[8].strip().lower() != 'na' else None,
-                'surface_modification': parts[9].strip() if parts[9].strip().lower() != 'na' else None,
-                'FPF': float(parts[10].strip()) if parts[10].strip() and parts[10].strip().lower() != 'na' else None,
-                'MMAD': float(parts[12].strip()) if parts[12].strip() and parts[12].strip().lower() != 'na' else None
-            }
+            # 创建制剂记录
+            form = Formulation(
+                name=parts[1].strip(),
+                particle_size=particle_size,
+                pdi=float(parts[4].strip()) if parts[4].strip() and parts[4].strip().lower() != 'na' else None,
+                zeta_potential=float(parts[6].strip()) if parts[6].strip() and parts[6].strip().lower() != 'na' else None,
+                carrier_type=parts[8].strip() if parts[8].strip().lower() != 'na' else None,
+                surface_modification=parts[9].strip() if parts[9].strip().lower() != 'na' else None,
+                fpf=float(parts[10].strip()) if parts[10].strip() and parts[10].strip().lower() != 'na' else None,
+                mmad=float(parts[12].strip()) if parts[12].strip() and parts[12].strip().lower() != 'na' else None
+            )
             formulations.append(form)
     
-    return formulations
+    return FormulationSet.from_formulations(formulations)
 
 def load_from_csv(file_path):
     """从CSV文件加载数据"""
     print(f"正在从CSV文件加载数据: {file_path}")
+    import pandas as pd
+    
     df = pd.read_csv(file_path)
     
-    formulations = []
-    for _, row in df.iterrows():
-        form = {
-            'name': row.get('name', ''),
-            'particle_size': row.get('particle_size') if pd.notna(row.get('particle_size')) else None,
-            'pdi': row.get('pdi') if pd.notna(row.get('pdi')) else None,
-            'zeta_potential': row.get('zeta') if pd.notna(row.get('zeta')) else None,
-            'carrier_type': row.get('carrier_type') if pd.notna(row.get('carrier_type')) else None,
-            'surface_modification': row.get('surface_modify') if pd.notna(row.get('surface_modify')) else None,
-            'FPF': row.get('FPF') if pd.notna(row.get('FPF')) else None,
-            'MMAD': row.get('mmad') if pd.notna(row.get('mmad')) else None
-        }
-        formulations.append(form)
+    # CSV列名 -> 制剂字段
+    column_map = {
+        'name': 'name',
+        'particle_size': 'particle_size',
+        'pdi': 'pdi',
+        'zeta': 'zeta_potential',
+        'carrier_type': 'carrier_type',
+        'surface_modify': 'surface_modification',
+        'FPF': 'fpf',
+        'mmad': 'mmad',
+        'refer': 'refer'
+    }
     
-    return formulations
+    columns = {field: df[col].to_numpy() for col, field in column_map.items() if col in df.columns}
+    return FormulationSet.from_columns(**columns)
 
 def load_data(file_path=None):
     """根据文件类型加载数据"""
@@ -102,58 +109,121 @@ def get_default_formulations():
     }
 
     # 默认的纳米制剂数据 5个自主添加 可删可修改 不影响验证
-    return [
-        {
-            'name': 'cur-lip-lc',
-            'particle_size': 94.65,
-            'pdi': 0.26,
-            'zeta_potential': None,  # NA值转为None
-            'carrier_type': 'Liposome',
-            'surface_modification': None,  # NA值转为None
-            'FPF': 46.71,
-            'MMAD': 5.81
-        },
-        {
-            'name': 'salbutamol-lip-asth',
-            'particle_size': 165,  
-            'pdi': 1.12,
-            'zeta_potential': 9.74,
-            'carrier_type': 'Liposome',
-            'surface_modification': 'None',
-            'FPF': 64.01,
-            'MMAD': 3.49
-        },
-        {
-            'name': 'ma-nlc-copd',
-            'particle_size': 19.67,
-            'pdi': 0.21,
-            'zeta_potential': -5.18,
-            'carrier_type': 'NLC',
-            'surface_modification': 'None',
-            'FPF': 68.90,
-            'MMAD': 3.36
-        },
-        {
-            'name': 'nint-plga-LF',
-            'particle_size': 179,
-            'pdi': 0.19,
-            'zeta_potential': -23.4,
-            'carrier_type': 'PLGA',
-            'surface_modification': 'None',
-            'FPF': 64.9,
-            'MMAD': 4.20
-        },
-        {
-            'name': 'COX2inhibi-PLGA-Lc',
-            'particle_size': 230.4,
-            'pdi': 0.075,
-            'zeta_potential': 18.7,
-            'carrier_type': 'PLGA',
-            'surface_modification': 'Poloxamer 188',
-            'FPF': 71,
-            'MMAD': 5.65
-        }
-    ]
+    return FormulationSet.from_formulations([
+        Formulation(
+            name='cur-lip-lc',
+            particle_size=94.65,
+            pdi=0.26,
+            zeta_potential=None,  # NA值转为None
+            carrier_type='Liposome',
+            surface_modification=None,  # NA值转为None
+            fpf=46.71,
+            mmad=5.81
+        ),
+        Formulation(
+            name='salbutamol-lip-asth',
+            particle_size=165,  
+            pdi=1.12,
+            zeta_potential=9.74,
+            carrier_type='Liposome',
+            surface_modification='None',
+            fpf=64.01,
+            mmad=3.49
+        ),
+        Formulation(
+            name='ma-nlc-copd',
+            particle_size=19.67,
+            pdi=0.21,
+            zeta_potential=-5.18,
+            carrier_type='NLC',
+            surface_modification='None',
+            fpf=68.90,
+            mmad=3.36
+        ),
+        Formulation(
+            name='nint-plga-LF',
+            particle_size=179,
+            pdi=0.19,
+            zeta_potential=-23.4,
+            carrier_type='PLGA',
+            surface_modification='None',
+            fpf=64.9,
+            mmad=4.20
+        ),
+        Formulation(
+            name='COX2inhibi-PLGA-Lc',
+            particle_size=230.4,
+            pdi=0.075,
+            zeta_potential=18.7,
+            carrier_type='PLGA',
+            surface_modification='Poloxamer 188',
+            fpf=71,
+            mmad=5.65
+        )
+    ])
+
+def load_pyplot():
+    """按需加载matplotlib, 使用非交互后端(Agg)只保存图片, 不弹出窗口阻塞运行"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def normalize_carrier_types(formulations):
+    """将载体类型统一为评分系统使用的写法"""
+    carrier_names = {
+        'liposome': 'Liposome',
+        'plga': 'PLGA',
+        'nlc': 'NLC',
+        'sln': 'SLN',
+        'polymer': 'PLGA'  # 假设polymer是PLGA类型
+    }
+    formulations.set_column('carrier_type', [
+        carrier_names.get(carrier.lower(), carrier) if isinstance(carrier, str) else carrier
+        for carrier in formulations['carrier_type']
+    ])
+
+def metric_correlation(formulations, scores, field):
+    """
+    计算评分与性能指标(FPF/MMAD)的Spearman相关性
+    
+    Args:
+        formulations (FormulationSet): 制剂集合
+        scores (numpy.ndarray): 与制剂集合对应的评分
+        field (str): 性能指标字段, 'fpf' 或 'mmad'
+        
+    Returns:
+        tuple: (非缺失掩码, 对应评分, 指标值, ρ, p值), 数据少于3个时ρ与p值为None
+    """
+    present = formulations.present(field)
+    values = formulations[field][present]
+    metric_scores = scores[present]
+    
+    if len(values) < 3:  # 至少需要3个值才能计算相关系数
+        return present, metric_scores, values, None, None
+    from scipy.stats import spearmanr
+    
+    correlation, p_value = spearmanr(metric_scores, values)
+    return present, metric_scores, values, correlation, p_value
+
+def print_model_comparison(formulations, scores, field, label, folds):
+    """打印各预测模型对某一性能指标的交叉验证结果"""
+    from model_comparison import compare_models, feature_matrix
+
+    present = formulations.present(field)
+    if present.sum() < 3:
+        print(f"{label}数据不足，无法比较预测模型")
+        return
+    results = compare_models(scores[present], feature_matrix(formulations)[present],
+                             formulations[field][present], folds=folds)
+    print(f"{label}预测模型对比 (n={present.sum()}, 留一法 / {folds}折交叉验证):")
+    print(f"  {'模型':<14}{'LOO RMSE':>10}{'LOO Q²':>9}{'k折 RMSE':>10}{'k折 Q²':>9}")
+    for model, metrics in results.items():
+        cells = []
+        for mode in ('loo', 'kfold'):
+            q2 = metrics[mode]['q2']
+            cells.append(f"{metrics[mode]['rmse']:>10.2f}" + (f"{q2:>9.2f}" if q2 is not None else f"{'NA':>9}"))
+        print(f"  {model:<14}" + ''.join(cells))
 
 def main():
     """主函数"""
@@ -163,89 +233,58 @@ def main():
     # 加载数据
     formulations = load_data(args.input)
     
-    # 确保数据格式正确
-    for form in formulations:
-        # 处理字符串'NA'为None
-        for key in form.keys():
-            if form[key] == 'NA':
-                form[key] = None
-        
-        # 确保载体类型格式正确
-        if form.get('carrier_type') and isinstance(form['carrier_type'], str):
-            if form['carrier_type'].lower() == 'liposome':
-                form['carrier_type'] = 'Liposome'
-            elif form['carrier_type'].lower() == 'plga':
-                form['carrier_type'] = 'PLGA'
-            elif form['carrier_type'].lower() == 'nlc':
-                form['carrier_type'] = 'NLC'
-            elif form['carrier_type'].lower() == 'sln':
-                form['carrier_type'] = 'SLN'
-            elif form['carrier_type'].lower() == 'polymer':
-                form['carrier_type'] = 'PLGA'  # 假设polymer是PLGA类型
+    # 确保载体类型格式正确
+    normalize_carrier_types(formulations)
     
     # 计算每个制剂的评分
-    for formulation in formulations:
-        score = calculate_score(
-            particle_size=formulation.get('particle_size'),
-            pdi=formulation.get('pdi'),
-            zeta_potential=formulation.get('zeta_potential'),
-            carrier_type=formulation.get('carrier_type'),
-            surface_modification=formulation.get('surface_modification'),
-            encapsulation_efficiency=formulation.get('encapsulation_efficiency'),
-            stability=formulation.get('stability'),
-            cellular_uptake=formulation.get('cellular_uptake'),
-            biodistribution=formulation.get('biodistribution')
-        )
-        formulation['score'] = score
-        print(f"{formulation['name']}: {score:.2f}")
+    scores = score_formulations(formulations, application=args.profile)
+    for name, score in zip(formulations['name'], scores):
+        print(f"{name}: {score:.2f}")
     
     # 使用FPF作为性能指标计算Spearman相关系数
-    fpf_values = []
-    score_values = []
-    
-    for form in formulations:
-        if 'FPF' in form and form['FPF'] is not None:
-            fpf_values.append(form['FPF'])
-            score_values.append(form['score'])
+    has_fpf, score_values, fpf_values, correlation_fpf, p_value_fpf = metric_correlation(
+        formulations, scores, 'fpf')
     
-    # 获取MMAD值和对应的评分值
-    mmad_values = []
-    mmad_score_values = []
-    for form in formulations:
-        if 'MMAD' in form and form['MMAD'] is not None:
-            mmad_values.append(form['MMAD'])
-            mmad_score_values.append(form['score'])
+    # 获取MMAD值和对应的评分值 - 使用原始MMAD值
+    has_mmad, mmad_score_values, mmad_values, correlation_mmad, p_value_mmad = metric_correlation(
+        formulations, scores, 'mmad')
     
     # 计算FPF与评分的相关性
-    if len(fpf_values) >= 3:  # 至少需要3个值才能计算相关系数
-        correlation_fpf, p_value_fpf = spearmanr(score_values, fpf_values)
+    if correlation_fpf is not None:
         print(f"FPF相关性: Spearman's ρ = {correlation_fpf:.2f}, p-value = {p_value_fpf:.4f}")
     else:
         print("FPF数据不足，无法计算相关性")
     
-    # 计算MMAD与评分的相关性 - 使用原始MMAD值
-    if len(mmad_values) >= 3:
-        correlation_mmad, p_value_mmad = spearmanr(mmad_score_values, mmad_values)
+    # 计算MMAD与评分的相关性
+    if correlation_mmad is not None:
         print(f"MMAD相关性: Spearman's ρ = {correlation_mmad:.2f}, p-value = {p_value_mmad:.4f}")
     else:
         print("MMAD数据不足，无法计算相关性")
     
+    # 与非线性预测模型对比
+    if args.compare_models:
+        print_model_comparison(formulations, scores, 'fpf', 'FPF', args.folds)
+        print_model_comparison(formulations, scores, 'mmad', 'MMAD', args.folds)
+    
     # 设置输出路径
     output_dir = args.output if args.output else '.'
     os.makedirs(output_dir, exist_ok=True)
     
+    if len(fpf_values) >= 2 or len(mmad_values) >= 2:
+        plt = load_pyplot()
+    
     # 可视化FPF评分与性能的关系
     if len(fpf_values) >= 2:
         plt.figure(figsize=(10, 6))
         plt.scatter(score_values, fpf_values)
-        for i, form in enumerate([f for f in formulations if 'FPF' in f and f['FPF'] is not None]):
-            plt.annotate(form['name'], (form['score'], form['FPF']))
+        for name, score, fpf in zip(formulations['name'][has_fpf], score_values, fpf_values):
+            plt.annotate(name, (score, fpf))
         plt.xlabel('Calculated Score')
         plt.ylabel('FPF (%)')
         plt.title('Correlation between Scoring System and Fine Particle Fraction')
         plt.grid(True)
         plt.savefig(os.path.join(output_dir, 'fpf_correlation.png'))
-        plt.show()
+        plt.close()
     
     # 可视化MMAD评分与性能的关系
     if len(mmad_values) >= 2:
@@ -256,8 +295,8 @@ def main():
         plt.axhspan(1, 5, alpha=0.2, color='green', label='Ideal MMAD Range (1-5 μm)')
         
         # 每个点添加标签
-        for i, form in enumerate([f for f in formulations if 'MMAD' in f and f['MMAD'] is not None]):
-            plt.annotate(form['name'], (form['score'], form['MMAD']))
+        for name, score, mmad in zip(formulations['name'][has_mmad], mmad_score_values, mmad_values):
+            plt.annotate(name, (score, mmad))
         
         plt.xlabel('Calculated Score')
         plt.ylabel('MMAD (μm)')
@@ -0,0 +1,242 @@
+# 评分权重配置: 从 profiles/ 目录加载命名权重方案, 加载时验证一次并缓存, 文件修改后自动重新加载
+# 方案文件(JSON)二选一:
+#   "weights": 直接给出各参数权重(如 hand_tuned.json)
+#   "source" + "keywords": 由 keyword_analysis.py 输出的 keyword_weights.csv 推导(如 literature.json),
+#   CSV中没有数据的参数用 "fixed" 给出固定权重
+# "applications" 列出使用该方案的应用类型, calculate_score(application=...) 据此选择方案;
+# 未列出的应用类型使用默认方案并给出警告; profiles/ 中缺少默认方案文件时使用内置的 hand_tuned 权重
+import os
+import time
+import warnings
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+
+# application为None时使用的方案
+DEFAULT_PROFILE = 'hand_tuned'
+
+# 参与加权的参数(顺序与 calculate_score 中的累加顺序一致)
+PARAMETERS = (
+    'particle_size', 'pdi', 'zeta_potential', 'carrier_type', 'surface_modification',
+    'toxicity', 'stability', 'cellular_uptake', 'biodistribution', 'encapsulation_efficiency'
+)
+
+# 内置方案: 方案文件不存在时使用(与 profiles/hand_tuned.json 一致)
+BUILTIN_PROFILES = {
+    'hand_tuned': {
+        'particle_size': 0.200,
+        'pdi': 0.075,
+        'zeta_potential': 0.075,
+        'carrier_type': 0.130,
+        'surface_modification': 0.130,
+        'toxicity': 0.125,
+        'stability': 0.125,
+        'cellular_uptake': 0.050,
+        'biodistribution': 0.050,
+        'encapsulation_efficiency': 0.040
+    }
+}
+
+# 两次检查文件是否修改之间的最短间隔(秒), 避免每次评分都访问文件系统
+CHECK_INTERVAL = 1.0
+
+# 方案名 -> (文件签名, 权重字典)
+_cache = {}
+# (目录签名, 应用类型 -> 方案名)
+_index = None
+_last_check = {}
+# 应用类型 -> (方案名, 解析时间)
+_resolved = {}
+
+
+def _signature(paths):
+    return tuple(os.stat(path).st_mtime_ns for path in paths)
+
+
+def _profile_path(name):
+    return os.path.join(PROFILE_DIR, f"{name}.json")
+
+
+def _read_json(path):
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _source_path(path, config):
+    return os.path.normpath(os.path.join(os.path.dirname(path), config['source']))
+
+
+def weights_from_keyword_csv(csv_path, keywords, fixed=None):
+    """
+    由 keyword_weights.csv 推导参数权重
+
+    CSV中不存在的关键词会给出警告。
+
+    Args:
+        csv_path (str): keyword_analysis.py 输出的CSV(类别,相对权重,参数,参数权重)
+        keywords (dict): 评分参数 -> 对应的关键词列表
+        fixed (dict, optional): 评分参数 -> 固定权重, 其余参数按关键词权重分配剩余部分
+
+    Returns:
+        dict: 归一化后的参数权重
+    """
+    fixed = fixed or {}
+    import csv
+    keyword_weights = {}
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # 跳过表头
+        for row in reader:
+            if len(row) < 4:
+                continue
+            _, category_weight, keyword, keyword_weight = row[:4]
+            keyword_weights[keyword] = float(category_weight) * float(keyword_weight)
+
+    unmatched = [k for param in PARAMETERS for k in keywords.get(param, []) if k not in keyword_weights]
+    if unmatched:
+        warnings.warn(f"Keywords not found in {csv_path}: {unmatched}")
+
+    weights = {param: sum(keyword_weights.get(k, 0.0) for k in keywords.get(param, []))
+               for param in PARAMETERS if param not in fixed}
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError(f"No scoring keywords found in {csv_path}")
+    remaining = 1 - sum(fixed.values())
+    weights = {param: weight / total * remaining for param, weight in weights.items()}
+    weights.update({param: float(value) for param, value in fixed.items()})
+    return weights
+
+
+def validate_weights(weights, name=''):
+    """验证权重: 参数齐全、为正且总和为1(允许0.01的误差); 权重为0的参数会被静默排除在评分之外, 因此不允许"""
+    missing = [param for param in PARAMETERS if param not in weights]
+    if missing:
+        raise ValueError(f"Weight profile {name!r} is missing parameters: {missing}")
+    unknown = [param for param in weights if param not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"Weight profile {name!r} has unknown parameters: {unknown}")
+    if any(weight < 0 for weight in weights.values()):
+        raise ValueError(f"Weight profile {name!r} has negative weights")
+    zero = [param for param in PARAMETERS if weights[param] == 0]
+    if zero:
+        raise ValueError(f"Weight profile {name!r} gives zero weight to {zero}; "
+                         f"add matching keywords or a 'fixed' weight")
+    total_weight = sum(weights.values())
+    if not 0.99 <= total_weight <= 1.01:
+        raise ValueError(f"Weight sum should be 1.0, got {total_weight}")
+
+
+def _load(name):
+    """读取并验证一个方案, 返回(签名, 权重字典)"""
+    path = _profile_path(name)
+    if not os.path.exists(path):
+        if name in BUILTIN_PROFILES:
+            return None, BUILTIN_PROFILES[name]
+        raise ValueError(f"Unknown weight profile {name!r}; available: {list_profiles()}")
+    config = _read_json(path)
+    if 'weights' in config:
+        weights = {param: float(value) for param, value in config['weights'].items()}
+        files = [path]
+    else:
+        source = _source_path(path, config)
+        weights = weights_from_keyword_csv(source, config['keywords'], config.get('fixed'))
+        files = [path, source]
+    validate_weights(weights, name)
+    # 按参数顺序存放, 评分时直接按顺序取用
+    return _signature(files), {param: weights[param] for param in PARAMETERS}
+
+
+def _files(name):
+    path = _profile_path(name)
+    config = _read_json(path)
+    return [path] if 'weights' in config else [path, _source_path(path, config)]
+
+
+def get_profile(name):
+    """
+    返回命名方案的权重字典(缓存, 请勿修改)
+
+    文件在缓存后被修改时(最多 CHECK_INTERVAL 秒后)自动重新加载。
+    """
+    now = time.monotonic()
+    cached = _cache.get(name)
+    if cached is not None and now - _last_check.get(name, 0.0) < CHECK_INTERVAL:
+        return cached[1]
+
+    if cached is not None:
+        try:
+            unchanged = _signature(_files(name)) == cached[0]
+        except OSError:
+            unchanged = False
+        if unchanged:
+            _last_check[name] = now
+            return cached[1]
+
+    _cache[name] = _load(name)
+    _last_check[name] = now
+    return _cache[name][1]
+
+
+def list_profiles():
+    """返回 profiles/ 目录下所有方案名"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(f[:-5] for f in os.listdir(PROFILE_DIR) if f.endswith('.json'))
+
+
+def _application_index():
+    """应用类型 -> 方案名, 目录或任一方案文件变化时重建"""
+    global _index
+    names = list_profiles()
+    if not names:
+        return {}
+    signature = (os.stat(PROFILE_DIR).st_mtime_ns, tuple(names),
+                 _signature([_profile_path(name) for name in names]))
+    if _index is None or _index[0] != signature:
+        mapping = {}
+        for name in names:
+            for application in _read_json(_profile_path(name)).get('applications', []):
+                mapping[application.lower()] = name
+        _index = (signature, mapping)
+    return _index[1]
+
+
+def resolve_profile(application=None):
+    """
+    将应用类型或方案名解析为方案名; 未知的应用类型使用默认方案并给出警告
+
+    Args:
+        application (str, optional): 应用类型(如'pulmonary')或方案名(如'literature'); None使用默认方案
+
+    Returns:
+        str: 方案名
+    """
+    if application is None:
+        return DEFAULT_PROFILE
+    key = application.lower()
+    if key in _cache or key in BUILTIN_PROFILES or os.path.exists(_profile_path(key)):
+        return key
+    mapping = _application_index()
+    if key in mapping:
+        return mapping[key]
+    warnings.warn(f"No weight profile for application {application!r}, using {DEFAULT_PROFILE!r}; "
+                  f"profiles: {list_profiles()}, applications: {sorted(mapping)}")
+    return DEFAULT_PROFILE
+
+
+def get_weights(application=None):
+    """返回应用类型(或方案名)对应的权重字典(缓存, 请勿修改)"""
+    now = time.monotonic()
+    resolved = _resolved.get(application)
+    if resolved is None or now - resolved[1] >= CHECK_INTERVAL:
+        resolved = _resolved[application] = (resolve_profile(application), now)
+    return get_profile(resolved[0])
+
+
+def clear_cache():
+    """清空已加载的方案"""
+    global _index
+    _cache.clear()
+    _last_check.clear()
+    _resolved.clear()
+    _index = None